@@ -0,0 +1,2910 @@
+"""
+CC-RRT Complete Edition
+
+Algorithm Ref: Chance Constrained RRT fot Probabilistic Robustness to Environment Uncertainty
+
+set all angle as rad
+no control noise
+"""
+
+import collections
+import contextlib
+import math
+import os
+import sys
+import time
+
+import matplotlib.pyplot as plt
+from matplotlib.patches import Ellipse, Rectangle
+import numpy as np
+from scipy.special import erf, erfcinv, erfinv
+
+show_animation = True
+
+
+class Vehicle:
+    def __init__(self):
+        self.l_f = 4.51 * 0.5  # 前距离
+        self.l_r = 4.51 * 0.5  # 后距离
+        self.w = 2.0  # 车宽
+
+
+class CCRRT:
+    """
+    Class for CCRRT planning
+    """
+
+    # gain schedule of the steering law by heading error: (|angle| above, P[0, 0], D[0, 0], min speed,
+    # max turn rate), the first row that applies is used
+    pid_schedule = (
+        (math.pi / 3.0, 0.05, -0.10, 1.0, math.pi),
+        (math.pi / 6.0, 0.25, -0.5, 6.5, math.pi),
+        (-math.inf, 1.0, -2.0, 13.0, math.pi / 2.0),
+    )
+    motion_primitive_cache = {}  # steering law, grid -> MotionPrimitives, shared by all planners
+    # everything the PID steering law (pid_law, pid_rollout) depends on, immutable, see get_steering_law
+    # turn_p, turn_d: P[1, 1], D[1, 1], max_speed: max_vehicle_speed
+    SteeringLaw = collections.namedtuple("SteeringLaw", ("schedule", "turn_p", "turn_d", "max_speed", "delta_time",
+                                                         "dis_threshold", "max_steer_step"))
+
+    class Node:
+        """
+        node not on the tree yet (sampling, steering), Tree.append stores it and returns a NodeView
+        """
+        __slots__ = ("x", "y", "yaw", "conv", "depth", "parent", "time", "cc", "cc_sum", "cost", "cost_lb", "cost_ub",
+                     "index")
+
+        zero_conv = np.zeros((3, 3))
+        zero_conv.setflags(write=False)
+
+        def __init__(self, x, y, yaw):
+            self.x = x
+            self.y = y
+            self.yaw = yaw
+            self.conv = self.zero_conv  # uncertainty matrix, shared read-only zeros until set
+            self.depth = 0  # number of steering steps from the root
+            self.parent = None
+            self.time = 0.0  # travaling time, for calculate cost
+            self.cc = 0.0  # chance constraint, for calculate cost
+            self.cc_sum = 0.0  # cc summed from the root, risk of the path so far (rewiring cost to come)
+            self.cost = 0.0  # cost = f(time, cc)
+            self.cost_lb = 0.0  # cost lower bound
+            self.cost_ub = math.inf  # cost upper bound
+            self.index = None  # index in the tree once appended
+
+    class Tree:
+        """
+        tree storage, node states are kept in preallocated arrays (structure of arrays)
+        the arrays grow by doubling, parent is the index of the parent node (-1 for the root)
+        children are linked lists in index arrays: first_child / last_child of a node, next_sibling of a child
+        (-1: none), in the order they were linked, so subtree walks are linear in the subtree size
+        tree[i] returns a NodeView of node i
+        with a shared conv_cache the covariance is not stored per node, it is read from the cache by depth
+        """
+        scalar_fields = ("x", "y", "yaw", "time", "cc", "cc_sum", "cost", "cost_lb", "cost_ub")
+        link_fields = ("parent", "first_child", "last_child", "next_sibling")
+
+        def __init__(self, capacity=1024, conv_cache=None):
+            self.n = 0
+            self.capacity = max(int(capacity), 1)
+            for name in self.scalar_fields:
+                setattr(self, name, np.zeros(self.capacity))
+            for name in self.link_fields:
+                setattr(self, name, np.full(self.capacity, -1, dtype=np.int64))
+            self.depth = np.zeros(self.capacity, dtype=np.int64)
+            self.conv_cache = conv_cache if conv_cache is not None and conv_cache.shared else None
+            self.conv = np.zeros((self.capacity, 3, 3)) if self.conv_cache is None else None
+
+        def array_fields(self):
+            fields = self.scalar_fields + self.link_fields + ("depth",)
+            return fields if self.conv is None else fields + ("conv",)
+
+        def __len__(self):
+            return self.n
+
+        def __getitem__(self, idx):
+            idx = int(idx)
+            if idx < 0:
+                idx += self.n
+            if not 0 <= idx < self.n:
+                raise IndexError("tree index out of range")
+            return CCRRT.NodeView(self, idx)
+
+        def __iter__(self):
+            for idx in range(self.n):
+                yield CCRRT.NodeView(self, idx)
+
+        def grow(self, capacity):
+            for name in self.array_fields():
+                old = getattr(self, name)
+                new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                new[:self.n] = old[:self.n]
+                setattr(self, name, new)
+            for name in self.link_fields:
+                getattr(self, name)[self.n:] = -1
+            self.capacity = capacity
+
+        def append(self, node):
+            """
+            store node (Node or NodeView), its parent must be on the tree already
+            return the NodeView of the stored node
+            """
+            if self.n == self.capacity:
+                self.grow(2 * self.capacity)
+            idx = self.n
+            for name in self.scalar_fields:
+                getattr(self, name)[idx] = getattr(node, name)
+            self.depth[idx] = node.depth
+            if self.conv is not None:
+                self.conv[idx] = node.conv
+            if node.parent is None:
+                self.parent[idx] = -1
+            else:
+                assert node.parent.index is not None, "parent of a new node must be on the tree"
+                self.parent[idx] = node.parent.index
+                self.link_child(idx, node.parent.index)
+            self.n += 1
+            if isinstance(node, CCRRT.Node):
+                node.index = idx
+            return CCRRT.NodeView(self, idx)
+
+        def nbytes(self):
+            return sum(getattr(self, name).nbytes for name in self.array_fields())
+
+        def link_child(self, idx, parent):
+            """
+            append node idx to the children of parent
+            """
+            self.next_sibling[idx] = -1
+            last = self.last_child[parent]
+            if last < 0:
+                self.first_child[parent] = idx
+            else:
+                self.next_sibling[last] = idx
+            self.last_child[parent] = idx
+
+        def unlink_child(self, idx, parent):
+            """
+            remove node idx from the children of parent, O(number of children)
+            """
+            prev, child = -1, self.first_child[parent]
+            while child != idx:
+                prev, child = child, self.next_sibling[child]
+            following = self.next_sibling[idx]
+            if prev < 0:
+                self.first_child[parent] = following
+            else:
+                self.next_sibling[prev] = following
+            if self.last_child[parent] == idx:
+                self.last_child[parent] = prev
+            self.next_sibling[idx] = -1
+
+        def set_parent(self, idx, parent):
+            """
+            move node idx under parent (-1: no parent), the child lists follow
+            """
+            old_parent = self.parent[idx]
+            if old_parent >= 0:
+                self.unlink_child(idx, old_parent)
+            self.parent[idx] = parent
+            if parent >= 0:
+                self.link_child(idx, parent)
+
+        def children(self, idx):
+            """
+            indices of the children of node idx
+            """
+            first_child, next_sibling = self.first_child, self.next_sibling
+            children = []
+            child = first_child[idx].item()
+            while child >= 0:
+                children.append(child)
+                child = next_sibling[child].item()
+            return children
+
+        def subtree(self, idx):
+            """
+            indices of node idx and all nodes below it, preorder
+            """
+            order = []
+            stack = [idx]
+            while stack:
+                idx = stack.pop()
+                order.append(idx)
+                stack.extend(reversed(self.children(idx)))
+            return order
+
+        def levels(self, nodes=None):
+            """
+            the nodes (default all) grouped by depth, shallowest first, so a level only needs the levels before it
+            """
+            nodes = np.arange(self.n) if nodes is None else np.asarray(nodes, dtype=np.int64)
+            depth = self.depth[nodes]
+            order = np.argsort(depth, kind="stable")
+            return np.split(nodes[order], np.flatnonzero(np.diff(depth[order])) + 1)
+
+        def subset(self, indices):
+            """
+            new tree of the nodes indices, in that order (a root first)
+            a parent not in indices becomes -1 (a new root), child lists are in the new index order
+            return (tree, remap), remap[old index] = new index or -1
+            """
+            indices = np.asarray(indices, dtype=np.int64)
+            m = len(indices)
+            tree = CCRRT.Tree(max(self.capacity, m), self.conv_cache)
+            for name in self.scalar_fields + ("depth",):
+                getattr(tree, name)[:m] = getattr(self, name)[indices]
+            if tree.conv is not None:
+                tree.conv[:m] = self.conv[indices]
+            remap = np.full(self.n, -1, dtype=np.int64)
+            remap[indices] = np.arange(m)
+            parent = self.parent[indices]
+            parent = np.where(parent >= 0, remap[np.maximum(parent, 0)], -1)
+            tree.parent[:m] = parent
+            tree.n = m
+            # child lists: the children of a node are a run of the nodes sorted by (parent, index)
+            order = np.nonzero(parent >= 0)[0]
+            if len(order):
+                order = order[np.argsort(parent[order], kind="stable")]
+                ps = parent[order]
+                same = ps[1:] == ps[:-1]
+                tree.next_sibling[order[:-1][same]] = order[1:][same]
+                first, last = np.r_[True, ~same], np.r_[~same, True]
+                tree.first_child[ps[first]] = order[first]
+                tree.last_child[ps[last]] = order[last]
+            return tree, remap
+
+    class NodeView:
+        """
+        lightweight handle to a node stored in a Tree, reads and writes go to the tree arrays
+        """
+        __slots__ = ("tree", "index")
+
+        def __init__(self, tree, index):
+            self.tree = tree
+            self.index = index
+
+        def __eq__(self, other):
+            return isinstance(other, CCRRT.NodeView) and self.tree is other.tree and self.index == other.index
+
+        def __hash__(self):
+            return hash((id(self.tree), self.index))
+
+        def _field(name):
+            def getter(self):
+                return getattr(self.tree, name)[self.index].item()
+
+            def setter(self, value):
+                getattr(self.tree, name)[self.index] = value
+
+            return property(getter, setter)
+
+        x = _field("x")
+        y = _field("y")
+        yaw = _field("yaw")
+        time = _field("time")
+        cc = _field("cc")
+        cc_sum = _field("cc_sum")
+        cost = _field("cost")
+        cost_lb = _field("cost_lb")
+        cost_ub = _field("cost_ub")
+        del _field
+
+        @property
+        def depth(self):
+            return int(self.tree.depth[self.index])
+
+        @property
+        def conv(self):
+            if self.tree.conv is None:
+                return self.tree.conv_cache.get(self.depth)
+            return self.tree.conv[self.index]
+
+        @conv.setter
+        def conv(self, value):
+            if self.tree.conv is None:
+                raise AttributeError("conv is shared by depth in this tree, it can not be set per node")
+            self.tree.conv[self.index] = value
+
+        @property
+        def parent(self):
+            parent = self.tree.parent[self.index]
+            return None if parent < 0 else CCRRT.NodeView(self.tree, int(parent))
+
+        @parent.setter
+        def parent(self, value):
+            self.tree.set_parent(self.index, -1 if value is None else value.index)
+
+    class ConvCache:
+        """
+        covariance of steered nodes indexed by steering depth
+        with J1 = I and zero control noise, steer gives conv(depth) = conv(depth - 1) + sigma_pose,
+        so every node at the same depth has the same matrix; they are computed once and shared (read-only)
+        with control noise the covariance depends on the heading, shared is False and steer propagates it
+        """
+
+        def __init__(self, conv_0, sigma_pose, sigma_control, capacity=64):
+            self.shared = not np.any(sigma_control)
+            self.sigma_pose = np.array(sigma_pose, dtype=float)
+            self.table = np.array(conv_0, dtype=float).reshape(1, 3, 3)
+            self.table.setflags(write=False)
+            if self.shared:
+                self.grow(capacity)
+
+        def grow(self, size):
+            table = np.empty((size, 3, 3))
+            n = len(self.table)
+            table[:n] = self.table
+            for depth in range(n, size):
+                # same additions as the full propagation, so the values are identical
+                table[depth] = table[depth - 1] + self.sigma_pose
+            table.setflags(write=False)
+            self.table = table
+
+        def get(self, depth):
+            if depth >= len(self.table):
+                self.grow(max(2 * len(self.table), depth + 1))
+            return self.table[depth]
+
+    class NeighbourGrid:
+        """
+        radius queries over the tree nodes, uniform grid of cell_size cells: (i, j) -> tree indices
+        node positions never change, so nodes appended to the tree are only added (on the next query)
+        """
+
+        def __init__(self, tree, cell_size):
+            self.tree = tree
+            self.cell_size = cell_size
+            self.cells = {}
+            self.n = 0  # nodes of tree in the grid
+
+        def update(self):
+            tree, n = self.tree, len(self.tree)
+            cells = np.floor(np.stack((tree.x[self.n:n], tree.y[self.n:n]), axis=1) / self.cell_size).astype(np.int64)
+            for idx, cell in enumerate(map(tuple, cells.tolist()), self.n):
+                self.cells.setdefault(cell, []).append(idx)
+            self.n = n
+
+        def query(self, x, y, radius):
+            """
+            indices of the tree nodes within radius of (x, y)
+            """
+            self.update()
+            i0, i1 = math.floor((x - radius) / self.cell_size), math.floor((x + radius) / self.cell_size)
+            j0, j1 = math.floor((y - radius) / self.cell_size), math.floor((y + radius) / self.cell_size)
+            idx = np.array([idx for i in range(i0, i1 + 1) for j in range(j0, j1 + 1)
+                            for idx in self.cells.get((i, j), ())], dtype=np.int64)
+            return idx[np.hypot(self.tree.x[idx] - x, self.tree.y[idx] - y) <= radius]
+
+    class MotionPrimitives:
+        """
+        PID rollouts from the pose (0, 0, 0) to a polar grid of targets, dis_0 + i * dis_step away at heading error
+        -pi + j * angle_step: a rollout only depends on where the target is seen from the start pose, so it is
+        rolled out once here and moved to the start pose at plan time (primitive_rollout)
+        law: SteeringLaw, dis_0: its dis_threshold
+        """
+
+        def __init__(self, law, max_dis, dis_step, angle_step):
+            self.dis_0 = dis_0 = law.dis_threshold
+            self.dis_step = dis_step
+            self.n_dis = math.ceil((max_dis - dis_0) / dis_step) + 1
+            self.n_angle = round(2 * math.pi / angle_step)
+            self.angle_step = 2 * math.pi / self.n_angle
+            dis, angle = np.meshgrid(dis_0 + dis_step * np.arange(self.n_dis),
+                                     -math.pi + self.angle_step * np.arange(self.n_angle), indexing="ij")
+            zeros = np.zeros(dis.size)
+            poses, n_poses = CCRRT.pid_rollout_batch(zeros, zeros, zeros, dis.ravel() * np.cos(angle.ravel()),
+                                                     dis.ravel() * np.sin(angle.ravel()), law)
+            self.poses = poses.astype(np.float32).reshape(self.n_dis, self.n_angle, -1, 3)
+            self.n_poses = n_poses.reshape(self.n_dis, self.n_angle)
+
+        def lookup(self, dis, angle):
+            """
+            relative poses of the rollout to the grid target nearest to (dis, angle), None beyond the grid
+            """
+            i = round((dis - self.dis_0) / self.dis_step)
+            if not 0 <= i < self.n_dis:
+                return None
+            j = round((angle + math.pi) / self.angle_step) % self.n_angle
+            return self.poses[i, j, :self.n_poses[i, j]]
+
+    class ObstacleGeometry:
+        """
+        geometry of an obstacle list [(x, y, long half axis, short half axis, yaw), ...], computed once
+        corners: K*5*2 closed corner lists [p0, p1, p2, p3, p0] (clockwise)
+        normals, offsets: K*4*2 unit outward normals of the edges corners[k] -> corners[k+1] and a^T p of the edges
+        radius_sq, radius: (squared) radius of the bounding circles
+        order, sorted_x, sorted_y: broad phase index, obstacles (centers) sorted by center y, see candidates
+        cc_terms: obstacle terms of chance_constrain_batch
+        cc_spread: the larger x / y diagonal entry of abs_mat of cc_terms, bounds a^T abs_mat a for unit a
+        """
+
+        broad_phase_min = 32  # with fewer obstacles candidates returns all of them, the index costs more than it saves
+
+        def __init__(self, obstacle_list):
+            self.obstacle_list = obstacle_list
+            obs = np.array([tuple(obs[:5]) for obs in obstacle_list], dtype=float).reshape(-1, 5)
+            self.center = obs[:, 0:2]
+            self.half_length = obs[:, 2]
+            self.half_width = obs[:, 3]
+            self.yaw = obs[:, 4]
+            self.cos = np.cos(self.yaw)
+            self.sin = np.sin(self.yaw)
+            self.corners = self.rect_corners(obs[:, 0], obs[:, 1], obs[:, 2], obs[:, 3], obs[:, 4])
+            edges = self.corners[:, 1:] - self.corners[:, :-1]
+            edges = edges / np.hypot(edges[..., 0], edges[..., 1])[..., None]
+            self.normals = np.stack((-edges[..., 1], edges[..., 0]), axis=-1)  # left of a clockwise edge is outside
+            self.offsets = np.sum(self.normals * self.corners[:, :-1], axis=-1)
+            self.radius_sq = (obs[:, 2] ** 2 + obs[:, 3] ** 2) * (1.0 + 1e-9)  # a bit larger for rounding
+            self.radius = np.sqrt(self.radius_sq)
+            self.order = np.argsort(self.center[:, 1], kind="stable")
+            self.sorted_x = self.center[self.order, 0]
+            self.sorted_y = self.center[self.order, 1]
+            self.cc_terms = CCRRT.get_obstacle_cc_terms(obstacle_list)
+            self.cc_spread = np.maximum(self.cc_terms[1][:, 0, 0], self.cc_terms[1][:, 1, 1])
+
+        def __len__(self):
+            return len(self.center)
+
+        def candidates(self, xs, ys, reach):
+            """
+            indices (ascending) of the obstacles whose center may be within reach of at least one point (xs, ys)
+            reach: scalar or K array (per obstacle)
+            broad phase: a y window [min(ys) - max(reach), max(ys) + max(reach)] is cut out of the sorted centers,
+            only the obstacles in the window get the distance check
+            """
+            xs = np.asarray(xs, dtype=float).reshape(-1)
+            ys = np.asarray(ys, dtype=float).reshape(-1)
+            if not len(xs) or not len(self):
+                return np.zeros(0, dtype=int)
+            if len(self) < self.broad_phase_min:
+                return np.arange(len(self))
+            reach = np.asarray(reach, dtype=float)
+            margin = reach.max()
+            lo = self.sorted_y.searchsorted(ys.min() - margin, side="left")
+            hi = self.sorted_y.searchsorted(ys.max() + margin, side="right")
+            ks = self.order[lo:hi]
+            if not len(ks):
+                return ks
+            d_sq = (xs[:, None] - self.sorted_x[lo:hi]) ** 2 + (ys[:, None] - self.sorted_y[lo:hi]) ** 2
+            near = (d_sq <= (reach[ks] if reach.ndim else reach) ** 2).any(axis=0)
+            return np.sort(ks[near])
+
+        @staticmethod
+        def points_in_rects(xs, ys, cx, cy, cos, sin, half_length, half_width):
+            """
+            M*K mask, point m strictly inside rectangle k
+            points are moved into each rectangle's frame: |local x| < half_length and |local y| < half_width
+            """
+            dx = np.asarray(xs, dtype=float)[:, None] - cx
+            dy = np.asarray(ys, dtype=float)[:, None] - cy
+            return (np.abs(dx * cos + dy * sin) < half_length) & (np.abs(dy * cos - dx * sin) < half_width)
+
+        def contains(self, xs, ys):
+            """
+            M*K mask, point m inside obstacle k
+            """
+            return self.points_in_rects(xs, ys, self.center[:, 0], self.center[:, 1], self.cos, self.sin,
+                                        self.half_length, self.half_width)
+
+        def contains_any(self, xs, ys):
+            """
+            M mask, point m inside any obstacle; only obstacles whose bounding circle holds some point are tested
+            """
+            xs = np.asarray(xs, dtype=float).reshape(-1)
+            ys = np.asarray(ys, dtype=float).reshape(-1)
+            ks = self.candidates(xs, ys, self.radius)
+            if not len(ks):
+                return np.zeros(len(xs), dtype=bool)
+            return self.points_in_rects(xs, ys, self.center[ks, 0], self.center[ks, 1], self.cos[ks], self.sin[ks],
+                                        self.half_length[ks], self.half_width[ks]).any(axis=1)
+
+        def overlaps(self, xs, ys, cos, sin, half_length, half_width, ks=None):
+            """
+            n*K mask, rectangle i (center xs, ys, heading cos / sin, half sizes) overlaps obstacle k
+            or n*len(ks) for the obstacles ks only (e.g. from candidates)
+            separating axis test: two rectangles are apart if their projections on one of the four edge directions
+            (two per rectangle) do not overlap; touching rectangles do not collide
+            """
+            ks = slice(None) if ks is None else ks
+            center, o_cos, o_sin = self.center[ks], self.cos[ks], self.sin[ks]
+            o_half_length, o_half_width = self.half_length[ks], self.half_width[ks]
+            xs, ys = np.asarray(xs, dtype=float)[:, None], np.asarray(ys, dtype=float)[:, None]
+            cos, sin = np.asarray(cos, dtype=float)[:, None], np.asarray(sin, dtype=float)[:, None]
+            half_length = np.asarray(half_length, dtype=float).reshape(-1, 1)
+            half_width = np.asarray(half_width, dtype=float).reshape(-1, 1)
+            dx = center[:, 0] - xs
+            dy = center[:, 1] - ys
+            # |cos| and |sin| of the heading difference
+            abs_c = np.abs(cos * o_cos + sin * o_sin)
+            abs_s = np.abs(sin * o_cos - cos * o_sin)
+            apart = (np.abs(dx * cos + dy * sin) >= half_length + o_half_length * abs_c + o_half_width * abs_s) | \
+                    (np.abs(dy * cos - dx * sin) >= half_width + o_half_length * abs_s + o_half_width * abs_c) | \
+                    (np.abs(dx * o_cos + dy * o_sin) >= o_half_length + half_length * abs_c + half_width * abs_s) | \
+                    (np.abs(dy * o_cos - dx * o_sin) >= o_half_width + half_length * abs_s + half_width * abs_c)
+            return ~apart
+
+        def hits_any(self, xs, ys):
+            """
+            True if any point is inside any obstacle, stops at the first obstacle that is hit
+            only the candidates whose bounding circle holds some point are tested
+            """
+            xs = np.asarray(xs, dtype=float).reshape(-1)
+            ys = np.asarray(ys, dtype=float).reshape(-1)
+            for k in self.candidates(xs, ys, self.radius):
+                dx = xs - self.center[k, 0]
+                dy = ys - self.center[k, 1]
+                near = dx * dx + dy * dy <= self.radius_sq[k]
+                if not near.any():
+                    continue
+                dx, dy = dx[near], dy[near]
+                inside = (np.abs(dx * self.cos[k] + dy * self.sin[k]) < self.half_length[k]) & \
+                         (np.abs(dy * self.cos[k] - dx * self.sin[k]) < self.half_width[k])
+                if inside.any():
+                    return True
+            return False
+
+        @staticmethod
+        def rect_corners(x, y, l, w, yaw):
+            """
+            corners [p0, p1, p2, p3, p0] of rectangles centered at (x, y) with half length l, half width w
+            clockwise, works for scalars (5*2) and arrays (K*5*2)
+            """
+            cos, sin = np.cos(yaw), np.sin(yaw)
+            p = np.array([
+                [x + l * cos + w * sin, y + l * sin - w * cos],
+                [x - l * cos + w * sin, y - l * sin - w * cos],
+                [x - l * cos - w * sin, y - l * sin + w * cos],
+                [x + l * cos - w * sin, y + l * sin + w * cos],
+                [x + l * cos + w * sin, y + l * sin - w * cos],
+            ], dtype=float)
+            return np.moveaxis(p, -1, 0) if p.ndim == 3 else p
+
+    class PhaseTimer:
+        """
+        accumulated time (time.perf_counter, s) and number of runs of one planning phase, used as a context manager
+        a phase entered again while it runs is timed once
+        """
+        __slots__ = ("total", "calls", "depth", "start")
+
+        def __init__(self):
+            self.total = 0.0
+            self.calls = 0
+            self.depth = 0
+            self.start = 0.0
+
+        def __enter__(self):
+            if not self.depth:
+                self.start = time.perf_counter()
+            self.depth += 1
+            return self
+
+        def __exit__(self, *exc_info):
+            self.depth -= 1
+            if not self.depth:
+                self.total += time.perf_counter() - self.start
+            self.calls += 1
+            return False
+
+    class Metric:
+        """
+        phase timers and counters of one planning run with metric
+        phases nest: steer includes its cc and collision checks, goal_connect its steer and backpropogation,
+        rewire, validate and goal_tree their cc and collision checks, goal_tree its connections (goal_connect)
+        """
+        phases = ("sampling", "nearest", "steer", "cc", "collision", "goal_connect", "backpropogation", "rewire",
+                  "validate", "goal_tree")
+        counters = ("iterations", "samples", "samples_rejected", "steer_attempts", "nodes_added", "rewires",
+                    "paths_rejected", "bounded", "goal_tree_nodes", "tree_connections")
+
+        def __init__(self):
+            self.timers = {name: CCRRT.PhaseTimer() for name in self.phases}
+            self.counts = dict.fromkeys(self.counters, 0)
+
+        def phase(self, name):
+            return self.timers[name]
+
+        def add(self, name, n=1):
+            self.counts[name] += n
+
+        def record(self):
+            """
+            flat dict of the counters, <phase>_time and <phase>_calls
+            """
+            record = dict(self.counts)
+            for name, timer in self.timers.items():
+                record[name + "_time"] = timer.total
+                record[name + "_calls"] = timer.calls
+            return record
+
+    class NullMetric:
+        """
+        Metric of a planning run without metric, phase and add do nothing
+        """
+        null_phase = contextlib.nullcontext()
+
+        def phase(self, name):
+            return self.null_phase
+
+        def add(self, name, n=1):
+            pass
+
+        def record(self):
+            return {}
+
+    def __init__(self, car, start, goal, obstacle_list, rand_area, cc_obstacle_list=None, collision_obstacle_list=None,
+                 rng=None):
+        """
+        Setting Parameter
+        start:Start Position [x,y,yaw]
+        goal:Goal Position [x,y,yaw]
+        obstacleList:obstacle
+        randArea:Random Sampling Area [min,max]
+        cc_obstacle_list: obstacles for the chance constraint, default obstacle_list
+        collision_obstacle_list: obstacles for the collision check of safe_steer, default obstacle_list
+        rng: np.random.Generator for sampling and the heuristic, or a seed / SeedSequence for one (None: fresh entropy)
+        """
+        self.car = car
+        self.rng = np.random.default_rng(rng)
+        self.metric = self.NullMetric()  # phase timers and counters, see planning(with_metric=True)
+        self.start = self.Node(start[0], start[1], start[2])
+        self.end = self.Node(goal[0], goal[1], goal[2])
+        self.obstacle_list = obstacle_list
+        self.obstacle_geometry = self.ObstacleGeometry(obstacle_list)  # corners, edges, cc terms of obstacle_list
+        self.obstacle_geometry_cache = {}  # other obstacle lists (e.g. ground truth), see get_obstacle_geometry
+        self.cc_obstacle_list = obstacle_list if cc_obstacle_list is None else cc_obstacle_list
+        self.collision_obstacle_list = obstacle_list if collision_obstacle_list is None else collision_obstacle_list
+        self.cc_geometry = self.get_obstacle_geometry(self.cc_obstacle_list)
+
+        assert len(rand_area) == 4, "rand_area = [x-min, x-max, y-min, y-max]"
+        self.min_rand_x = rand_area[0]
+        self.max_rand_x = rand_area[1]
+        self.min_rand_y = rand_area[2]
+        self.max_rand_y = rand_area[3]
+
+        # self.path_resolution = 1.0
+        # self.goal_sample_rate = 10 # goal_sample_rate% set goal as sampling node
+
+        self.node_list = self.Tree()  # tree storage, see CCRRT.Tree
+        self.max_iter = 200
+
+        self.max_n_path = 100  # save no more than n_path feasible path to choose
+        self.n_path_when_change_strategy = 25
+        self.max_n_node = 5000  # save no more than max_node nodes on tree
+        self.time_budget = None  # seconds of search per planning call, then the best path so far is returned
+        self.delta_time = 0.1  # dt second
+        self.dis_threshold = 1.0  # distance threshold for steering
+
+        self.max_vehicle_turn_rate = np.pi  # vehicle max turning rate
+        self.max_angle_diff = np.pi / 2.0
+        self.max_vehicle_speed = 18.0  # m/s
+        self.min_vehicle_speed = 0.0  # m/s, steering keeps the speed floors of pid_schedule
+
+        self.expect_speed = self.max_vehicle_speed / 2.0  # used for hueristic distance calculation
+        self.expect_turn_rate = self.max_vehicle_turn_rate / 4.0  # used for hueristic distance calculation
+
+        # params
+        self.k_cc = 100  # for chance_constrain value: node_cost = time + k_cc * node.cc
+        # for expect dis: heu_value = k_dis * dis() + (1-k_dis) * node_cost
+        # or with k_dis percentage sampling dis() and (1-k_dis) sampling node_cost
+        # k_node_cost = 1 - k_dis
+        self.k_dis_explore = 0.7  # k_dis value when pay more attention to exploration (more radical)
+        self.k_dis_exploit = 0.3  # k_dis value when pay more attention to exploit (safer)
+        # the same as k_dis / k_node_cost, but used for find a path relatively close to goal
+        self.k_dis_when_no_path = 0.85
+
+        # PID control matrix, P[0, 0] and D[0, 0] follow pid_schedule (get_steering_law)
+        self.P = np.diag([1.0, 5.0])  # 2*2
+        # self.I = np.diag([0.1, 0.5]) # 2*2
+        self.D = np.diag([-2.0, -6.5])  # 2*2
+        self.max_steer_step = 30  # max n_step for steering
+
+        self.p_safe = 0.95  # p_safe for chance constraint#-------------------------------------------------------------------------------这是对完全系数
+        self.cc_filter = True  # drop steps with cc >= 1 - p_safe (cc-rrt), False: cc only goes into the cost (cl-rrt)
+        # obstacles far enough to add less than cc_cull_eps each to a chance constraint are skipped
+        # (see get_cc_terms_near), None or 0: always use all obstacles
+        self.cc_cull_eps = 1e-12
+
+        self.sigma_x0 = np.diag([0.2, 0.2, 0.1])  # sigma_x0
+        self.sigma_control = np.diag([0.0, 0.0])  # control noise
+        self.sigma_pose = np.array([
+            [0.02, 0.01, 0.00],
+            [0.01, 0.02, 0.00],
+            [0.00, 0.00, 0.01]
+        ])
+
+        self.batch_steer_check = True  # steer: roll out the whole trajectory first and check it in batch
+        # motion primitives (pid steering): rollouts are looked up in a MotionPrimitives grid of primitive_dis_step
+        # by primitive_angle_step over the sampling area (get_motion_primitives) and moved to the start pose
+        # instead of integrated, targets the grid does not reach are still integrated
+        self.motion_primitives = False
+        self.primitive_dis_step = 0.5  # m
+        self.primitive_angle_step = math.radians(1.0)
+        # steering backend: "pid" integrates the PID controller step by step (steer_rollout), "dubins" samples a
+        # closed-form curvature-bounded path at dubins_speed, turn radius dubins_speed / dubins_turn_rate
+        # (dubins_rollout), goal connections arrive with the goal heading
+        self.steering = "pid"
+        # rrt*-style rewiring: new nodes take a cheaper parent nearby and become the parent of nearby nodes they
+        # make cheaper (see rewire_node), edges are single steering steps (get_steps)
+        self.rewiring = False
+        self.rewire_radius = self.max_vehicle_speed * self.delta_time  # longest step
+        self.rewire_max_turn = self.max_vehicle_turn_rate * self.delta_time  # largest heading change of a step
+        self.rewire_heading_tol = 0.05  # rad, direction of a step off the heading of its parent
+        self.neighbour_grid = None  # NeighbourGrid of node_list, see get_neighbour_grid
+        # lazy collision checking: steering checks the chance constraint and in_place of the poses, safe_steer
+        # (collision and cc of the interpolated points, most of the geometry) waits until a path reaches the goal
+        # (validate_path), infeasible nodes are dropped with their subtrees
+        self.lazy_check = False
+        self.invalid_nodes = []  # tree indices found infeasible by validate_path, see prune_invalid
+        # branch and bound: once a path is found, nodes every path through which scores worse than the best path
+        # (get_path_score_lb) are neither expanded nor connected to the goal
+        self.branch_and_bound = False
+        self.bound_evict = False  # also drop those nodes with their subtrees
+        self.dominated = None  # mask of the bounded tree nodes (the tree when it was computed), see update_bound
+        # bidirectional search: a second tree grows backward from the goal with reversed unicycle steps
+        # (steer_backward), forward nodes join its nodes (connect_to_goal_tree) and its path to the goal is
+        # propagated forward from the junction, covariance and cc included
+        self.bidirectional = False
+        self.n_nearest_backward = 3  # goal tree nodes steered toward each sample
+        self.goal_tree = None  # Tree grown backward from the goal, time: time to the goal, see make_goal_tree
+        # the trees are joined by a curvature-bounded path to the pose of a goal tree node (join_rollout), the
+        # dubins steering backend drives the same speed and turn rate
+        self.dubins_speed = 13.0  # m/s, the lowest speed pid_control keeps on a small heading error
+        self.dubins_turn_rate = self.max_vehicle_turn_rate  # turn radius about 4.1 m
+        self.sample_block_size = 64  # get_random_node draws this many points at once
+        self.sample_goal_margin = 10  # random nodes have y <= end.y + sample_goal_margin, None: y <= max_rand_y
+        self.sample_buffer = np.zeros((0, 2))  # obstacle free samples not used yet, see fill_sample_buffer
+        self.sample_index = 0
+        self.sample_bounds = None  # sampling area of sample_buffer
+        self.nearest_node_step = 8  # get nodes to do tree expanding, used in get_nearest_node_index
+        self.n_nearest = 15  # get n nearest nodes, used in get_nearest_node_index
+        self.steer_back_step = 8  # used after find a path and try connect to goal after steering
+
+        # init
+        # self.sigma_x0[0,0] /= self.path_resolution
+        # self.sigma_x0[1,1] /= self.path_resolution
+        # self.sigma_control[0,0] /= self.path_resolution
+        # self.dis_threshold /= self.path_resolution
+        # self.max_vehicle_speed /= self.path_resolution
+        # self.min_vehicle_speed /= self.path_resolution
+
+        self.start.conv = self.sigma_x0
+        self.conv_cache = self.ConvCache(self.start.conv, self.sigma_pose, self.sigma_control)
+        self.start.time = 0.0
+        self.start.cc = self.get_chance_constrain(self.start)
+        self.start.cc_sum = self.start.cc
+        self.start.cost = self.get_cost(self.start.time, self.start.cc)
+        self.start.cost_lb = self.get_cost_lb(self.start)
+        self.start.cost_ub = math.inf
+
+        self.path_end = []  # save path ending point, if len(path_end) >= n_path, we will stop searching to get the best path
+        self.path = []  # save the final path
+        self.path_source = None  # "path_end": path reaches the goal, "close_to_goal": get_close_to_goal_index fallback
+        self.reset_path_scores()
+        self.deadline = None  # time.perf_counter() value the search stops at, see time_budget
+        self.timed_out = False  # the last search stopped at the deadline
+
+        self.with_metric = False  # planning metric item
+        self.metrics = {}  # metric record of the last planning run with metric
+
+    def planning(self, animation=False, with_metric=False, time_budget=None, reuse_tree=False):
+        """
+        cc_rrt path planning
+        animation: flag for animation on or off
+        with_metric start metric: time / nodes until the first path, total time, per phase timers and counters
+        (Metric), collected in self.metrics; without it the instrumentation does nothing
+        time_budget: seconds of search (default self.time_budget, None: no deadline), when they are used up the
+        best path so far is returned, path_source tells whether it reaches the goal
+        reuse_tree: go on growing the tree (and path_end) of the last call instead of a new one, see replan
+        """
+        print("Begin CC-RRT")
+        time_budget = self.time_budget if time_budget is None else time_budget
+        self.deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.timed_out = False
+        if not reuse_tree:
+            self.conv_cache = self.ConvCache(self.start.conv, self.sigma_pose, self.sigma_control)
+            self.node_list = self.Tree(self.max_n_node + self.max_steer_step + 1, self.conv_cache)
+            self.node_list.append(self.start)
+            self.path_end = []
+            self.invalid_nodes = []
+            self.dominated = None
+            self.goal_tree = None
+            self.reset_path_scores()
+        if self.bidirectional and self.goal_tree is None:
+            self.goal_tree = self.make_goal_tree()
+        self.path = []
+
+        self.metric = self.Metric() if with_metric else self.NullMetric()
+        if with_metric:
+            self.with_metric = True
+            self.node_when_find_first_path = -1
+            self.time_when_find_first_path = -1.0
+            self.total_time = 0.0
+            self.timer_start = time.perf_counter()
+
+        for i in range(self.max_iter):
+            if i % 10 == 0:
+                print("Iter:", i, ", number of nodes:", len(self.node_list))
+
+            self.metric.add("iterations")
+            self.prune_invalid()
+            if self.branch_and_bound:
+                self.update_bound()
+            with self.metric.phase("sampling"):
+                sample_node = self.get_random_node()
+            self.metric.add("samples")
+            with self.metric.phase("nearest"):
+                nearest_ind = self.get_nearest_node_index(self.node_list, sample_node, self.n_nearest,
+                                                          self.nearest_node_step)
+
+            for idx in nearest_ind:
+                if self.is_dominated(idx):
+                    self.metric.add("bounded")
+                    continue
+                nearest_node = self.node_list[idx]
+
+                # Running some checks in increasing order of computational complexity
+                # Do some checking
+                # Check 1: Does the sample co-inside with nearest node?
+                if self.calc_distance(sample_node, nearest_node) < self.dis_threshold:
+                    continue
+                sample_node.yaw = np.arctan2(
+                    sample_node.y - nearest_node.y,
+                    sample_node.x - nearest_node.x,
+                )
+
+                # Check 2: Is the steer angle within the acceptable range?
+                if not self.angle_check(nearest_node, sample_node, self.max_angle_diff):
+                    continue
+
+                # local planner sampling (also updates sample.conv)
+                self.local_planner(nearest_node, sample_node)
+
+                if self.search_done():
+                    break
+
+            if self.bidirectional and not self.search_done():
+                with self.metric.phase("goal_tree"):
+                    self.grow_goal_tree(sample_node)
+
+            # to displaying cc-rrt searching
+            # if i % 5 == 0:
+            #     self.draw_graph(sample_node)
+            #     plt.pause(2.0)
+            # self.draw_graph(sample_node)
+            # plt.pause(1.0)
+
+            # if len(path_end) >= n_path, we will stop searching to get the best path
+            if self.search_done():
+                break
+
+        # end cc_rrt loop
+        print("Tree with %d nodes generated" % len(self.node_list))
+        if self.timed_out:
+            print("Time budget used up, returning the best path so far")
+
+        final_goal_node = self.choose_final_node()
+
+        # return path
+        while final_goal_node:
+            self.path.append(final_goal_node)
+            final_goal_node = final_goal_node.parent
+
+        if self.with_metric:
+            self.total_time = time.perf_counter() - self.timer_start
+            self.metrics = dict(self.metric.record(),
+                                total_time=self.total_time,
+                                time_when_find_first_path=self.time_when_find_first_path,
+                                node_when_find_first_path=self.node_when_find_first_path,
+                                nodes=len(self.node_list),
+                                paths=len(self.path_end),
+                                timed_out=self.timed_out)
+
+        return self.path
+
+    def choose_final_node(self):
+        """
+        end node of the returned path: the best path in path_end, else the node closest to the goal
+        with lazy_check the path is validated first (rewiring may have moved a path under unchecked nodes),
+        infeasible ones are pruned and the next one is chosen
+        """
+        while True:
+            self.prune_invalid()
+            if len(self.path_end):
+                final_goal_node = self.path_end[self.get_best_path_end_index()]
+                self.path_source = "path_end"
+            else:
+                # choose a feasible path can drive to goal closer
+                nearest_ind = self.get_close_to_goal_index(self.node_list)
+                final_goal_node = self.node_list[nearest_ind]
+                self.path_source = "close_to_goal"
+            if not self.lazy_check:
+                break
+            with self.metric.phase("validate"):
+                if self.validate_path(final_goal_node):
+                    break
+        if self.path_source == "path_end":
+            print("%d path be found" % len(self.path_end))
+        else:
+            print("No path found!")
+        return final_goal_node
+
+    def search_done(self):
+        """
+        stop criteria of the search: enough paths, a full tree or the deadline (sets timed_out)
+        """
+        if len(self.path_end) > self.max_n_path or len(self.node_list) > self.max_n_node:
+            return True
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.timed_out = True
+            return True
+        return False
+
+    def get_best_path_end_index(self):
+        """
+        choosing best path: index of the path_end whose path has the lowest max cost_ub (the first one on ties)
+        kept up to date by backpropogation, see update_path_scores
+        """
+        return self.best_path_end_idx
+
+    def reset_path_scores(self):
+        """
+        empty best path tracking for a new tree
+        """
+        self.path_max_ub = {}  # tree index -> max cost_ub from the root to the node, for nodes on a path in path_end
+        self.path_children = {}  # tree index -> children on a path in path_end
+        self.path_end_ids = {}  # tree index of a path end -> its index in path_end
+        self.path_scores = []  # max cost_ub of every path in path_end
+        self.best_path_end_idx = -1
+
+    def update_path_scores(self, chain):
+        """
+        update the path scores (max cost_ub from the root to the path end) and the best path after backpropogation
+        changed cost_ub on chain (tree indices from the new path end up to the root)
+        only chain and the path nodes below a node whose max changed are visited, not every path in path_end
+        """
+        cost_ub, parents = self.node_list.cost_ub, self.node_list.parent
+        # link the new part of the chain into the paths tree
+        for child, parent in zip(chain, chain[1:]):
+            if child in self.path_max_ub:
+                break
+            self.path_children.setdefault(parent, []).append(child)
+        self.path_end_ids[chain[0]] = len(self.path_scores)
+        self.path_scores.append(math.inf)
+
+        # root -> path end along the chain, then down the other paths below the nodes that changed
+        changed = []
+        path_max = -math.inf
+        for idx in reversed(chain):
+            path_max = max(path_max, cost_ub[idx].item())
+            if self.path_max_ub.get(idx) != path_max:
+                self.path_max_ub[idx] = path_max
+                changed.append(idx)
+        on_chain = set(chain)
+        stack = [child for idx in changed for child in self.path_children.get(idx, ()) if child not in on_chain]
+        while stack:
+            idx = stack.pop()
+            path_max = max(self.path_max_ub[parents[idx].item()], cost_ub[idx].item())
+            if self.path_max_ub[idx] != path_max:
+                self.path_max_ub[idx] = path_max
+                changed.append(idx)
+                stack.extend(self.path_children.get(idx, ()))
+
+        for idx in changed:
+            if idx in self.path_end_ids:
+                self.set_path_score(self.path_end_ids[idx], self.path_max_ub[idx])
+
+    def set_path_score(self, path_idx, score):
+        """
+        set the score of path_end[path_idx], the best path only has to be searched again when it got worse
+        """
+        old_score = self.path_scores[path_idx]
+        self.path_scores[path_idx] = score
+        best = self.best_path_end_idx
+        if best < 0 or (score, path_idx) < (self.path_scores[best], best):
+            self.best_path_end_idx = path_idx
+        elif path_idx == best and score > old_score:
+            self.best_path_end_idx = min(range(len(self.path_scores)), key=lambda i: (self.path_scores[i], i))
+
+    def replan(self, obstacle_list, cc_obstacle_list=None, collision_obstacle_list=None, root=None,
+               animation=False, with_metric=False, time_budget=None):
+        """
+        incremental replanning after an obstacle update, the tree of the last planning call is reused
+        obstacle_list, cc_obstacle_list, collision_obstacle_list: the updated lists, as for __init__
+        root: tree node (or index) the ego car has reached, e.g. on self.path, it becomes the new start
+        (None: keep the start)
+        update_tree repairs the tree, then planning goes on growing it, time_budget only counts the search
+        """
+        self.update_tree(obstacle_list, cc_obstacle_list, collision_obstacle_list, root)
+        return self.planning(animation, with_metric, time_budget, reuse_tree=True)
+
+    def update_tree(self, obstacle_list, cc_obstacle_list=None, collision_obstacle_list=None, root=None):
+        """
+        replace the obstacle lists and repair the tree for them (see replan)
+        without a new root only the nodes whose step from the parent is near an added or removed obstacle get
+        their cc and feasibility checked again (nodes_near_obstacles), with a new root the covariances start again
+        from sigma_x0, so every kept node gets a new cc
+        infeasible nodes are dropped with their subtrees, the paths in path_end that are left are scored again
+        """
+        old_cc_list, old_list = self.cc_obstacle_list, self.obstacle_list
+        old_collision_list = self.collision_obstacle_list
+        self.obstacle_list = obstacle_list
+        self.obstacle_geometry = self.ObstacleGeometry(obstacle_list)
+        self.obstacle_geometry_cache = {}
+        self.cc_obstacle_list = obstacle_list if cc_obstacle_list is None else cc_obstacle_list
+        self.collision_obstacle_list = obstacle_list if collision_obstacle_list is None else collision_obstacle_list
+        self.cc_geometry = self.get_obstacle_geometry(self.cc_obstacle_list)
+        self.goal_tree = None  # grown for the old obstacles, planning starts a new one
+        # samples drawn for the old obstacles
+        self.sample_buffer = np.zeros((0, 2))
+        self.sample_index = 0
+        self.sample_bounds = None
+
+        self.prune_invalid()
+        tree = self.node_list
+        root = 0 if root is None else int(getattr(root, "index", root))
+        if root:
+            tree, remap = tree.subset(self.node_list.subtree(root))
+            m = len(tree)
+            tree.time[:m] -= self.node_list.time[root]
+            tree.depth[:m] -= self.node_list.depth[root]
+            if tree.conv is not None:
+                tree.conv[:m] += self.sigma_x0 - self.node_list.conv[root]
+            self.path_end = [tree[remap[node.index]] for node in self.path_end if remap[node.index] >= 0]
+            check = np.arange(m)
+        else:
+            idx = np.arange(len(tree))
+            added, removed = self.changed_obstacles(old_cc_list, self.cc_obstacle_list)
+            near = self.nodes_near_obstacles(idx, added + removed, chance_constraint=True)
+            added, _ = self.changed_obstacles(old_collision_list, self.collision_obstacle_list)
+            near |= self.nodes_near_obstacles(idx, added)
+            added, _ = self.changed_obstacles(old_list, self.obstacle_list)
+            near |= self.nodes_near_obstacles(idx, added)
+            check = np.nonzero(near)[0]
+        self.node_list = tree
+
+        ok, ccs = self.check_tree_nodes(check)
+        tree.cc[check] = ccs
+        tree.cost[check] = self.get_cost(tree.time[check], ccs)
+        self.prune_subtrees(check[~ok])
+        tree = self.node_list
+        self.accumulate_cc(np.arange(len(tree)))
+        self.rescore_paths()
+
+        self.start = self.Node(tree.x[0].item(), tree.y[0].item(), tree.yaw[0].item())
+        for name in ("time", "cc", "cc_sum", "cost", "cost_lb"):
+            setattr(self.start, name, getattr(tree, name)[0].item())
+        self.start.conv = self.sigma_x0
+        self.start.cost_ub = math.inf
+        self.start.index = 0
+        self.path = []
+
+    def prune_subtrees(self, nodes):
+        """
+        drop the tree nodes nodes with their subtrees (a new, compacted Tree), path_end keeps the paths left
+        the path scores are not updated, see rescore_paths
+        """
+        tree = self.node_list
+        dropped = np.zeros(len(tree), dtype=bool)
+        for idx in nodes:
+            if not dropped[idx]:
+                dropped[tree.subtree(idx)] = True
+        if not dropped.any():
+            return
+        tree, remap = tree.subset(np.nonzero(~dropped)[0])
+        self.node_list = tree
+        self.path_end = [tree[remap[node.index]] for node in self.path_end if remap[node.index] >= 0]
+
+    def prune_invalid(self):
+        """
+        lazy_check: drop the nodes validate_path found infeasible, with their subtrees
+        only called between iterations, when no tree index or NodeView is held
+        """
+        if self.invalid_nodes:
+            self.prune_subtrees(self.invalid_nodes)
+            self.invalid_nodes = []
+            self.rescore_paths()
+
+    def get_path_score_lb(self):
+        """
+        lower bound of the score (update_path_scores) of any path through each tree node
+        backpropogation gives a node out of the goal region time-to-goal + delta_time + k_cc * cc, and no step is
+        longer than max_vehicle_speed * delta_time, so the time-to-goal is at least the distance to the goal region
+        at max_vehicle_speed (nodes in the goal region get 0)
+        a path through a node passes its ancestors too, so a node also gets the bounds of its ancestors
+        """
+        tree = self.node_list
+        n = len(tree)
+        dis = np.hypot(tree.x[:n] - self.end.x, tree.y[:n] - self.end.y) - self.dis_threshold
+        score_lb = np.where(dis < 0.0, 0.0, dis / self.max_vehicle_speed + self.delta_time + tree.cc[:n] * self.k_cc)
+        for level in tree.levels():
+            parents = tree.parent[level]
+            score_lb[level] = np.maximum(score_lb[level], np.where(parents >= 0, score_lb[np.maximum(parents, 0)], 0.0))
+        return score_lb
+
+    def update_bound(self):
+        """
+        branch_and_bound: mark the nodes whose get_path_score_lb is above the score of the best path (dominated)
+        with bound_evict they are dropped from the tree instead
+        """
+        self.dominated = None
+        if self.best_path_end_idx < 0:
+            return
+        dominated = self.get_path_score_lb() > self.path_scores[self.best_path_end_idx]
+        if self.bound_evict and dominated.any():
+            parents = self.node_list.parent[:len(dominated)]
+            self.prune_subtrees(np.flatnonzero(dominated & ~dominated[np.maximum(parents, 0)]))
+            self.rescore_paths()
+        else:
+            self.dominated = dominated
+
+    def is_dominated(self, idx):
+        """
+        tree node idx is bounded (update_bound), nodes added since are not
+        """
+        return self.dominated is not None and idx < len(self.dominated) and bool(self.dominated[idx])
+
+    def rescore_paths(self):
+        """
+        cost_ub and path scores of every path in path_end from scratch, after the tree changed under them
+        """
+        self.node_list.cost_ub[:len(self.node_list)] = math.inf
+        self.reset_path_scores()
+        for node in self.path_end:
+            self.backpropogation(node)
+
+    @staticmethod
+    def changed_obstacles(old_list, new_list):
+        """
+        obstacles (x, y, long half axis, short half axis, yaw) only in new_list and only in old_list
+        return (added, removed)
+        """
+        old = collections.Counter(tuple(obs[:5]) for obs in old_list)
+        new = collections.Counter(tuple(obs[:5]) for obs in new_list)
+        return list((new - old).elements()), list((old - new).elements())
+
+    def nodes_near_obstacles(self, idx, obstacles, chance_constraint=False):
+        """
+        mask of the tree nodes idx whose step from the parent (the node and the safe_steer points) may be affected
+        by one of obstacles: the bounding circles of car and obstacle meet, or with chance_constraint the
+        obstacle is within the cull reach of get_cc_terms_near (every node without cc_cull_eps)
+        every safe_steer point is within the step length of the node, so it is added to the reach
+        """
+        tree = self.node_list
+        if not len(obstacles) or not len(idx):
+            return np.zeros(len(idx), dtype=bool)
+        if chance_constraint and not self.cc_cull_eps:
+            return np.ones(len(idx), dtype=bool)
+        geometry = self.ObstacleGeometry(obstacles)
+        xs, ys = tree.x[idx], tree.y[idx]
+        parents = np.where(tree.parent[idx] >= 0, tree.parent[idx], idx)
+        step = np.hypot(xs - tree.x[parents], ys - tree.y[parents])
+        if chance_constraint:
+            convs = self.get_tree_convs(idx)
+            trace = convs[:, 0, 0] + convs[:, 1, 1]
+            h = max(self.car.l_f, self.car.l_r, self.car.w / 2.0)
+            reach = math.sqrt(2.0) * (h + erfcinv(2.0 * self.cc_cull_eps) *
+                                      np.sqrt(2.0 * (trace[:, None] + geometry.cc_spread)))
+        else:
+            reach = geometry.radius + math.hypot(max(self.car.l_f, self.car.l_r), self.car.w / 2.0) * (1.0 + 1e-9)
+        dist = np.hypot(xs[:, None] - geometry.center[:, 0], ys[:, None] - geometry.center[:, 1])
+        return (dist < reach + step[:, None]).any(axis=1)
+
+    def get_tree_convs(self, idx):
+        """
+        covariances of the tree nodes idx (n*3*3)
+        """
+        tree = self.node_list
+        if tree.conv is not None:
+            return tree.conv[idx]
+        depth = tree.depth[idx]
+        if len(depth):
+            self.conv_cache.get(int(depth.max()))
+        return self.conv_cache.table[depth]
+
+    def check_tree_nodes(self, idx):
+        """
+        the checks of check_trajectory for the tree nodes idx with the current obstacle lists: chance constraint,
+        in_place and safe_steer of the step from the parent (the root is always feasible)
+        return (feasible mask, cc of the nodes)
+        """
+        tree = self.node_list
+        xs, ys, yaws = tree.x[idx], tree.y[idx], tree.yaw[idx]
+        if not len(idx):
+            return np.ones(0, dtype=bool), np.zeros(0)
+        convs = self.get_tree_convs(idx)
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints_batch(xs, ys, yaws)
+            ccs = self.chance_constrain_batch(A, B, convs, self.get_cc_terms_near(xs, ys, convs))
+        ok = ccs < 1.0 - self.p_safe if self.cc_filter else np.ones(len(ccs), dtype=bool)
+        ok &= self.in_place_batch(xs, ys)
+
+        parents = tree.parent[idx]
+        has_parent = parents >= 0
+        ok[~has_parent] = True
+        parents = parents[has_parent]
+        ok[has_parent] &= self.check_steps(tree.x[parents], tree.y[parents], xs[has_parent], ys[has_parent])
+        return ok, ccs
+
+    def steer(self, from_node, to_node, exact_pose=False):
+        """
+        steer with chance constrain checking
+        begin: from_node
+        return path = [inter_node, ..., inter_node, to_node(if feasible)]
+        with batch_steer_check the PID trajectory is rolled out first and checked in batch (steer_batch),
+        otherwise every step is checked before the next one is integrated; both give the same nodes
+        lazy_check, motion_primitives and the dubins steering backend always use the batch rollout
+        exact_pose: (dubins) steer along the path that arrives with the heading of to_node, pid ignores it
+        """
+        if self.batch_steer_check or self.lazy_check or self.steering != "pid" or self.motion_primitives:
+            return self.steer_batch(from_node, to_node, exact_pose)
+
+        # reference v & w
+        dis, angle = self.calc_distance_and_angle(from_node, to_node)
+        angle = self.angle_wrap(angle - from_node.yaw)
+        u = self.pid_control(dis, angle, 0.0, 0.0)
+
+        # prev node: the first inter_node is a child of from_node itself (from_node is only read here)
+        prev = from_node
+
+        prev_dis = dis
+        prev_angle = angle
+
+        J1 = np.diag([1.0, 1.0, 1.0])
+
+        J2 = np.zeros((3, 2))
+        J2[0, 0] = self.delta_time * math.cos(prev.yaw)
+        J2[1, 0] = self.delta_time * math.sin(prev.yaw)
+        J2[2, 1] = self.delta_time
+
+        # get feasible node from N_near->N_sample
+        feasible_node_list = []
+        n_step = 0
+        # feaisble_to_end = True
+        while self.calc_distance(prev, to_node) > self.dis_threshold and n_step < self.max_steer_step:
+            pose = J1.dot(np.array([[prev.x], [prev.y], [prev.yaw]])) + J2.dot(u)
+            inter_node = self.Node(pose[0].item(), pose[1].item(), pose[2].item())
+            inter_node.parent = prev
+            inter_node.depth = prev.depth + 1
+            if self.conv_cache.shared:
+                inter_node.conv = self.conv_cache.get(inter_node.depth)
+            else:
+                inter_node.conv = J1.dot(prev.conv).dot(J1.transpose()) + \
+                                  J2.dot(self.sigma_control).dot(J2.transpose()) + \
+                                  self.sigma_pose
+            inter_node.cc = self.get_chance_constrain(inter_node)
+            if (not self.cc_filter or inter_node.cc < 1.0 - self.p_safe) and self.in_place(inter_node) and \
+                    self.safe_steer(inter_node):
+                inter_node.time = prev.time + self.delta_time
+                inter_node.cc_sum = prev.cc_sum + inter_node.cc
+                inter_node.cost = self.get_cost(inter_node.time, inter_node.cc)
+                inter_node.cost_lb = self.get_cost_lb(inter_node)
+                feasible_node_list.append(inter_node)
+                prev = inter_node  # inter_node will point to the next inter_node
+
+                # update J1 J2
+                J2[0, 0] = self.delta_time * math.cos(prev.yaw)
+                J2[1, 0] = self.delta_time * math.sin(prev.yaw)
+                J2[2, 1] = self.delta_time
+
+                dis, angle = self.calc_distance_and_angle(prev, to_node)
+                angle = self.angle_wrap(angle - prev.yaw)
+                u = self.pid_control(dis, angle, dis - prev_dis, angle - prev_angle)
+                prev_dis = dis
+                prev_angle = angle
+                n_step += 1
+            else:
+                # feaisble_to_end = False
+                break
+
+        # add to_node if possible
+        # if feaisble_to_end and n_step < self.max_steer_step:
+        #     to_node.parent = prev
+        #     to_node.conv = J1.dot(prev.conv).dot(J1.transpose()) + \
+        #                    J2.dot(self.sigma_control).dot(J2.transpose()) + \
+        #                    self.sigma_pose
+        #     to_node.cc = self.get_chance_constrain(to_node)
+        #     if to_node.cc < 1 - self.p_safe:
+        #         to_node.time = prev.time + self.delta_time
+        #         to_node.cost = self.get_cost(to_node.time, to_node.cc)
+        #         to_node.cost_lb = self.get_cost_lb(to_node)
+        #         feasible_node_list.append(to_node)
+
+        return feasible_node_list
+
+    def get_steering_law(self):
+        """
+        SteeringLaw of the current steering parameters
+        """
+        return self.SteeringLaw(self.pid_schedule, self.P[1, 1].item(), self.D[1, 1].item(), self.max_vehicle_speed,
+                                self.delta_time, self.dis_threshold, self.max_steer_step)
+
+    def pid_control(self, dis, angle, d_dis, d_angle):
+        """
+        pid_law with the steering law of the planner
+        return u = [[v], [w]]
+        """
+        v, w = self.pid_law(dis, angle, d_dis, d_angle, self.get_steering_law())
+        return np.array([[v], [w]])
+
+    @staticmethod
+    def pid_law(dis, angle, d_dis, d_angle, law):
+        """
+        gain schedule by heading error (law.schedule), then PD control with speed / turn rate limits
+        dis, angle: distance and heading error to the target, d_dis, d_angle: change since the last step
+        law: SteeringLaw, nothing is stored, so steering can run concurrently
+        return (v, w)
+        """
+        for bound, p_dis, d_dis_gain, min_speed, max_turn_rate in law.schedule:
+            if abs(angle) > bound:
+                break
+        v = max(min_speed, min(p_dis * dis + d_dis_gain * d_dis, law.max_speed))
+        w = law.turn_p * angle + law.turn_d * d_angle
+        if abs(w) > max_turn_rate:
+            w = np.sign(angle) * max_turn_rate
+        return v, w
+
+    def steer_rollout(self, from_node, to_node):
+        """
+        PID rollout from from_node to to_node without any feasibility checking, same steps as steer (pid_rollout)
+        return n*3 array of poses [x, y, yaw], n <= max_steer_step
+        """
+        return self.pid_rollout(from_node.x, from_node.y, from_node.yaw, to_node.x, to_node.y,
+                                self.get_steering_law())
+
+    @staticmethod
+    def pid_rollout(x, y, yaw, target_x, target_y, law):
+        """
+        the steering law as a function: pid_law steps from the pose (x, y, yaw) until within law.dis_threshold of
+        the target or law.max_steer_step poses
+        return n*3 array of poses [x, y, yaw]
+        """
+        dis = math.hypot(target_x - x, target_y - y)
+        angle = CCRRT.angle_wrap(math.atan2(target_y - y, target_x - x) - yaw)
+        v, w = CCRRT.pid_law(dis, angle, 0.0, 0.0, law)
+        prev_dis = dis
+        prev_angle = angle
+
+        poses = []
+        while dis > law.dis_threshold and len(poses) < law.max_steer_step:
+            x = x + law.delta_time * math.cos(yaw) * v
+            y = y + law.delta_time * math.sin(yaw) * v
+            yaw = yaw + law.delta_time * w
+            poses.append((x, y, yaw))
+
+            dx = target_x - x
+            dy = target_y - y
+            dis = math.hypot(dx, dy)
+            angle = CCRRT.angle_wrap(math.atan2(dy, dx) - yaw)
+            v, w = CCRRT.pid_law(dis, angle, dis - prev_dis, angle - prev_angle, law)
+            prev_dis = dis
+            prev_angle = angle
+        return np.array(poses, dtype=float).reshape(-1, 3)
+
+    def dubins_rollout(self, from_node, to_node, exact_pose=False):
+        """
+        steering backend "dubins": poses every delta_time along a curvature-bounded path from from_node to the pose
+        of to_node (dubins_path) with exact_pose, otherwise to its position (dubins_to_point); speed, turn rate and
+        steps as join_rollout
+        like steer_rollout it stops at the first pose within dis_threshold of to_node
+        return n*3 array of poses [x, y, yaw], n <= max_steer_step
+        """
+        if self.calc_distance(from_node, to_node) <= self.dis_threshold:
+            return np.zeros((0, 3))
+        speed = min(self.dubins_speed, self.max_vehicle_speed)
+        radius = speed / min(self.dubins_turn_rate, self.max_vehicle_turn_rate)
+        if exact_pose:
+            segments = self.dubins_path(from_node.x, from_node.y, from_node.yaw, to_node.x, to_node.y, to_node.yaw,
+                                        radius)
+        else:
+            segments = self.dubins_to_point(from_node.x, from_node.y, from_node.yaw, to_node.x, to_node.y, radius)
+        s = self.dubins_steps(segments, speed * self.delta_time)[:self.max_steer_step]
+        poses = self.dubins_poses(from_node.x, from_node.y, from_node.yaw, segments, radius, s)
+        arrived = np.hypot(to_node.x - poses[:, 0], to_node.y - poses[:, 1]) <= self.dis_threshold
+        if arrived.any():
+            poses = poses[:int(np.argmax(arrived)) + 1]
+        return poses
+
+    @staticmethod
+    def dubins_to_point(x0, y0, yaw0, x1, y1, radius):
+        """
+        path from pose 0 to point 1 (any heading) with turn radius radius: turn toward the point, then straight
+        along the tangent; a point inside that turning circle is reached turning the other way
+        return [(turn, length), ...] as dubins_path
+        """
+        bearing = math.atan2(y1 - y0, x1 - x0)
+        first_turn = 1 if CCRRT.angle_wrap(bearing - yaw0) >= 0 else -1
+        for turn in (first_turn, -first_turn):
+            cx, cy = x0 - turn * radius * math.sin(yaw0), y0 + turn * radius * math.cos(yaw0)
+            dc = math.hypot(x1 - cx, y1 - cy)
+            if dc >= radius:
+                break
+        # the tangent point seen from the center, the car at angle yaw0 - turn * pi / 2 goes there
+        tangent = math.atan2(y1 - cy, x1 - cx) - turn * math.acos(min(radius / dc, 1.0))
+        arc = CCRRT.angle_wrap(turn * (tangent - yaw0) + math.pi / 2)
+        if arc < -1e-9:
+            arc += 2 * math.pi
+        return [(turn, max(arc, 0.0) * radius), (0, math.sqrt(max(dc * dc - radius * radius, 0.0)))]
+
+    @staticmethod
+    def pid_law_batch(dis, angle, d_dis, d_angle, law):
+        """
+        pid_law for arrays of targets
+        return (v, w)
+        """
+        schedule = np.array(law.schedule)
+        regime = np.argmax(np.abs(angle)[:, None] > schedule[:, 0], axis=1)
+        p_dis, d_dis_gain, min_speed, max_turn_rate = schedule[regime, 1:].T
+        v = np.maximum(min_speed, np.minimum(p_dis * dis + d_dis_gain * d_dis, law.max_speed))
+        w = law.turn_p * angle + law.turn_d * d_angle
+        w = np.where(np.abs(w) > max_turn_rate, np.sign(angle) * max_turn_rate, w)
+        return v, w
+
+    @staticmethod
+    def pid_rollout_batch(xs, ys, yaws, target_x, target_y, law):
+        """
+        pid_rollout from every pose (xs, ys, yaws) to its target at once, e.g. several candidates or a primitive grid
+        return (k*max_steer_step*3 poses, number of poses pid_rollout gives for every rollout)
+        """
+        x, y, yaw = (np.array(values, dtype=float) for values in (xs, ys, yaws))
+        dis = np.hypot(target_x - x, target_y - y)
+        angle = CCRRT.angle_wrap_array(np.arctan2(target_y - y, target_x - x) - yaw)
+        v, w = CCRRT.pid_law_batch(dis, angle, np.zeros(len(x)), np.zeros(len(x)), law)
+        poses = np.zeros((len(x), law.max_steer_step, 3))
+        n_poses = np.where(dis > law.dis_threshold, law.max_steer_step, 0)
+        for i in range(law.max_steer_step):
+            x = x + law.delta_time * np.cos(yaw) * v
+            y = y + law.delta_time * np.sin(yaw) * v
+            yaw = yaw + law.delta_time * w
+            poses[:, i, 0], poses[:, i, 1], poses[:, i, 2] = x, y, yaw
+
+            next_dis = np.hypot(target_x - x, target_y - y)
+            next_angle = CCRRT.angle_wrap_array(np.arctan2(target_y - y, target_x - x) - yaw)
+            n_poses[(next_dis <= law.dis_threshold) & (n_poses > i + 1)] = i + 1
+            v, w = CCRRT.pid_law_batch(next_dis, next_angle, next_dis - dis, next_angle - angle, law)
+            dis, angle = next_dis, next_angle
+        return poses, n_poses
+
+    def get_motion_primitives(self):
+        """
+        MotionPrimitives for the steering law, out to the diagonal of the sampling area
+        built once and shared by every planner with the same parameters
+        """
+        max_dis = math.hypot(self.max_rand_x - self.min_rand_x, self.max_rand_y - self.min_rand_y)
+        law = self.get_steering_law()
+        key = (law, self.primitive_dis_step, self.primitive_angle_step, max_dis)
+        if key not in self.motion_primitive_cache:
+            self.motion_primitive_cache[key] = self.MotionPrimitives(law, max_dis, self.primitive_dis_step,
+                                                                     self.primitive_angle_step)
+        return self.motion_primitive_cache[key]
+
+    def primitive_rollout(self, from_node, to_node):
+        """
+        steer_rollout from the motion primitives: the rollout to the grid target nearest to to_node, rotated and
+        moved to from_node, it stops at the first pose within dis_threshold of to_node
+        return n*3 array of poses [x, y, yaw], n <= max_steer_step
+        """
+        dis, angle = self.calc_distance_and_angle(from_node, to_node)
+        if dis <= self.dis_threshold:
+            return np.zeros((0, 3))
+        relative = self.get_motion_primitives().lookup(dis, self.angle_wrap(angle - from_node.yaw))
+        if relative is None:
+            return self.steer_rollout(from_node, to_node)
+        cos, sin = math.cos(from_node.yaw), math.sin(from_node.yaw)
+        poses = np.empty(relative.shape)
+        poses[:, 0] = from_node.x + cos * relative[:, 0] - sin * relative[:, 1]
+        poses[:, 1] = from_node.y + sin * relative[:, 0] + cos * relative[:, 1]
+        poses[:, 2] = from_node.yaw + relative[:, 2]
+        arrived = np.hypot(to_node.x - poses[:, 0], to_node.y - poses[:, 1]) <= self.dis_threshold
+        if arrived.any():
+            poses = poses[:int(np.argmax(arrived)) + 1]
+        return poses
+
+    def get_rollout_conv(self, from_node, poses):
+        """
+        covariance of each rollout pose, n*3*3
+        """
+        if self.conv_cache.shared:
+            self.conv_cache.get(from_node.depth + len(poses))
+            return self.conv_cache.table[from_node.depth + 1:from_node.depth + 1 + len(poses)]
+        J1 = np.diag([1.0, 1.0, 1.0])
+        J2 = np.zeros((3, 2))
+        J2[2, 1] = self.delta_time
+        convs = np.zeros((len(poses), 3, 3))
+        conv, yaw = from_node.conv, from_node.yaw
+        for i in range(len(poses)):
+            J2[0, 0] = self.delta_time * math.cos(yaw)
+            J2[1, 0] = self.delta_time * math.sin(yaw)
+            conv = J1.dot(conv).dot(J1.transpose()) + J2.dot(self.sigma_control).dot(J2.transpose()) + self.sigma_pose
+            convs[i] = conv
+            yaw = poses[i, 2]
+        return convs
+
+    def steer_batch(self, from_node, to_node, exact_pose=False):
+        """
+        steer: roll out the whole trajectory, check it in batch, keep the poses before the first infeasible one
+        """
+        if self.steering == "dubins":
+            poses = self.dubins_rollout(from_node, to_node, exact_pose)
+        elif self.motion_primitives:
+            poses = self.primitive_rollout(from_node, to_node)
+        else:
+            poses = self.steer_rollout(from_node, to_node)
+        convs = self.get_rollout_conv(from_node, poses)
+        n_feasible, ccs = self.check_trajectory(from_node, poses, convs)
+        return self.make_nodes(from_node, poses[:n_feasible], convs, ccs)
+
+    def make_nodes(self, from_node, poses, convs, ccs):
+        """
+        chain of new nodes from_node -> poses (n*3) with the covariances and ccs of the poses
+        """
+        feasible_node_list = []
+        prev = from_node
+        for i in range(len(poses)):
+            inter_node = self.Node(poses[i, 0].item(), poses[i, 1].item(), poses[i, 2].item())
+            inter_node.parent = prev
+            inter_node.depth = prev.depth + 1
+            inter_node.conv = convs[i]
+            inter_node.cc = ccs[i].item()
+            inter_node.cc_sum = prev.cc_sum + inter_node.cc
+            inter_node.time = prev.time + self.delta_time
+            inter_node.cost = self.get_cost(inter_node.time, inter_node.cc)
+            inter_node.cost_lb = self.get_cost_lb(inter_node)
+            feasible_node_list.append(inter_node)
+            prev = inter_node
+        return feasible_node_list
+
+    def check_trajectory(self, from_node, poses, convs):
+        """
+        feasibility of a rollout (poses n*3, convs n*3*3) starting at from_node
+        the same checks as steer does per step: chance constraint, in_place, safe_steer
+        return (number of leading feasible poses, cc of every pose)
+        """
+        if not len(poses):
+            return 0, np.zeros(0)
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints_batch(poses[:, 0], poses[:, 1], poses[:, 2])
+            ccs = self.chance_constrain_batch(A, B, convs, self.get_cc_terms_near(poses[:, 0], poses[:, 1], convs))
+        feasible = ccs < 1.0 - self.p_safe if self.cc_filter else np.ones(len(ccs), dtype=bool)
+        n_feasible = len(poses) if feasible.all() else int(np.argmin(feasible))
+        if not n_feasible:
+            return 0, ccs
+        if self.lazy_check:
+            # safe_steer waits for validate_path
+            pose_ok = self.in_place_batch(poses[:n_feasible, 0], poses[:n_feasible, 1])
+            return n_feasible if pose_ok.all() else int(np.argmin(pose_ok)), ccs
+
+        # safe_steer of the steps between consecutive poses, in_place of the poses themselves
+        prev = np.array([[from_node.x, from_node.y, from_node.yaw]])
+        parents = np.vstack((prev, poses[:n_feasible - 1]))
+        pose_ok = self.check_steps(parents[:, 0], parents[:, 1], poses[:n_feasible, 0], poses[:n_feasible, 1])
+        pose_ok &= self.in_place_batch(poses[:n_feasible, 0], poses[:n_feasible, 1])
+        if not pose_ok.all():
+            n_feasible = int(np.argmin(pose_ok))
+        return n_feasible, ccs
+
+    def check_steps(self, parent_xs, parent_ys, xs, ys):
+        """
+        safe_steer of the steps parent -> node for arrays of parent and node positions: collision and
+        (with cc_filter) chance constraint of the interpolated points of all steps in one batch
+        return mask of the feasible steps
+        """
+        points = [self.safe_steer_points(parent_xs[i], parent_ys[i], xs[i], ys[i]) for i in range(len(xs))]
+        if not points:
+            return np.ones(0, dtype=bool)
+        xs = np.concatenate([xs for xs, _, _ in points])
+        ys = np.concatenate([ys for _, ys, _ in points])
+        yaws = np.concatenate([np.full(len(xs), yaw) for xs, _, yaw in points])
+        point_ok = ~self.peng_zhuang_jian_ce_batch(xs, ys, yaws, self.collision_obstacle_list)
+        if self.cc_filter:
+            with self.metric.phase("cc"):
+                A, B = self.vehicle_constraints_batch(xs, ys, yaws)
+                point_ok &= self.chance_constrain_batch(A, B, self.Node.zero_conv,
+                                                        self.get_cc_terms_near(xs, ys, self.Node.zero_conv)) < \
+                    1 - self.p_safe
+        # every step has at least 10 points, so no segment is empty
+        starts = np.cumsum([0] + [len(xs) for xs, _, _ in points[:-1]])
+        return np.logical_and.reduceat(point_ok, starts)
+
+    def vehicle_constraints_batch(self, x, y, yaw):
+        """
+        vehicle_constraints for arrays of poses
+        return (A, B), A: n*4*3 unit outward normals, B: n*4
+        """
+        p = self.ego_car_corners_batch(x, y, yaw).transpose(1, 2, 0)  # 4 corners * (x, y) * n
+        # edge k goes from corner k-1 to corner k, normal a_k, b_k = a_k^T p_k
+        edge = p - p[[3, 0, 1, 2]]
+        d = np.sqrt(edge[:, 0] ** 2 + edge[:, 1] ** 2)
+        a_x, a_y = edge[:, 0] / d, edge[:, 1] / d
+        A = np.stack((a_x, a_y, np.zeros_like(a_x)), axis=-1).transpose(1, 0, 2)
+        B = (a_x * p[:, 0] + a_y * p[:, 1]).T
+        return A, B
+
+    def generate_final_course(self, goal_ind):
+        path = [[self.end.x, self.end.y]]
+        node = self.node_list[goal_ind]
+        while node.parent is not None:
+            path.append([node.x, node.y])
+            node = node.parent
+        path.append([node.x, node.y])
+
+        return path
+
+    def local_planner(self, parent, sample):
+        self.metric.add("steer_attempts")
+        with self.metric.phase("steer"):
+            feasible_node_list = self.steer(parent, sample)
+        feasible_node_list = self.add_to_tree(feasible_node_list)
+        # find a path to goal
+        if len(feasible_node_list) and self.calc_distance(feasible_node_list[-1], self.end) < self.dis_threshold:
+            self.add_path_end(feasible_node_list[-1])
+            return
+        # no path to goal
+        # for each feasible node
+        with self.metric.phase("goal_connect"):
+            self.connect_to_goal(feasible_node_list)
+
+    def add_to_tree(self, feasible_node_list):
+        """
+        append steered nodes to the tree (and rewire them), return their NodeViews
+        """
+        feasible_node_list = [self.node_list.append(node) for node in feasible_node_list]
+        self.metric.add("nodes_added", len(feasible_node_list))
+        if self.rewiring and len(feasible_node_list):
+            with self.metric.phase("rewire"):
+                moved_paths = False
+                for node in feasible_node_list:
+                    moved_paths |= self.rewire_node(node.index)
+                if moved_paths:
+                    self.rescore_paths()
+        return feasible_node_list
+
+    def add_path_end(self, node):
+        """
+        save node (in the goal region) as the end of a path and update the upper-bound cost-to-goal of the path
+        with lazy_check only a path that passes validate_path is saved, return whether it was saved
+        """
+        if self.lazy_check:
+            with self.metric.phase("validate"):
+                if not self.validate_path(node):
+                    self.metric.add("paths_rejected")
+                    return False
+        self.path_end.append(node)  # save the end node of the path
+
+        # metric
+        if self.with_metric and len(self.path_end) == 1:
+            self.time_when_find_first_path = time.perf_counter() - self.timer_start
+            self.node_when_find_first_path = len(self.node_list)
+
+        # back propogation
+        with self.metric.phase("backpropogation"):
+            self.backpropogation(node)
+        return True
+
+    def validate_path(self, node):
+        """
+        lazy_check: the full checks (check_tree_nodes) of the path root -> node
+        the first infeasible node is dropped with its subtree between iterations (prune_invalid)
+        return whether the path is feasible
+        """
+        tree = self.node_list
+        chain = []
+        idx = node.index
+        while idx >= 0:
+            chain.append(idx)
+            idx = tree.parent[idx].item()
+        ok, _ = self.check_tree_nodes(np.array(chain[::-1], dtype=np.int64))
+        if ok.all():
+            return True
+        self.invalid_nodes.append(chain[::-1][int(np.argmin(ok))])
+        return False
+
+    def connect_to_goal(self, feasible_node_list):
+        """
+        try steering to the goal from every steer_back_step-th node of feasible_node_list
+        (the dubins backend steers to the goal pose, arriving with its heading)
+        """
+        for idx in range(0, len(feasible_node_list), self.steer_back_step):
+            # try connecting node to goal
+            node = feasible_node_list[idx]
+            if self.is_dominated(node.index):
+                self.metric.add("bounded")
+                continue
+            tmp_end_node = self.Node(self.end.x, self.end.y, 0.0)
+            tmp_end_node.yaw = np.arctan2(
+                tmp_end_node.y - node.y,
+                tmp_end_node.x - node.x,
+            )
+            connected = False
+            if self.angle_check(node, tmp_end_node, self.max_angle_diff):
+                self.metric.add("steer_attempts")
+                with self.metric.phase("steer"):
+                    node_to_goal_list = self.steer(node, self.end, exact_pose=True)
+                if len(node_to_goal_list) and self.calc_distance(node_to_goal_list[-1],
+                                                                 self.end) < self.dis_threshold:  # get to goal from current node
+                    node_to_goal_list = self.add_to_tree(node_to_goal_list)
+                    self.add_path_end(node_to_goal_list[-1])
+                    connected = True
+            # bidirectional: no direct connection, join the goal tree
+            if self.bidirectional and not connected and not self.search_done():
+                self.connect_to_goal_tree(node, self.goal_tree[self.get_goal_tree_index(node)])
+            if self.search_done():
+                break
+
+    def make_goal_tree(self):
+        """
+        Tree of the bidirectional search, rooted at the goal pose, time is the time to the goal
+        its nodes get the cc of sigma_x0, the smallest covariance a forward node can have, so only poses no path can
+        use are dropped; the real covariance and cc follow when a branch joins a path (connect_to_goal_tree)
+        """
+        tree = self.Tree(self.max_n_node + self.max_steer_step + 1)
+        goal = self.Node(self.end.x, self.end.y, self.end.yaw)
+        goal.conv = self.sigma_x0
+        goal.cc = self.get_chance_constrain(goal)
+        tree.append(goal)
+        return tree
+
+    def grow_goal_tree(self, sample):
+        """
+        steer the n_nearest_backward goal tree nodes closest to sample (same heuristic as the forward tree, with the
+        reversed heading) backward toward it, then try to reach the last new node from the forward tree
+        """
+        tree = self.goal_tree
+        n = len(tree)
+        if n > self.max_n_node:
+            return
+        dx, dy = sample.x - tree.x[:n], sample.y - tree.y[:n]
+        dis = np.hypot(dx, dy)
+        angle = np.abs(self.angle_wrap_array(np.arctan2(dy, dx) - tree.yaw[:n] - math.pi))
+        dlist = dis / self.expect_speed + angle / self.expect_turn_rate
+        for idx in np.argsort(dlist, kind="stable")[:self.n_nearest_backward]:
+            if dis[idx] < self.dis_threshold or angle[idx] > self.max_angle_diff:
+                continue
+            self.metric.add("steer_attempts")
+            with self.metric.phase("steer"):
+                goal_node_list = [tree.append(node) for node in self.steer_backward(tree[idx], sample)]
+            self.metric.add("goal_tree_nodes", len(goal_node_list))
+            if len(goal_node_list):
+                self.connect_trees(goal_node_list[-1])
+            if self.search_done():
+                break
+
+    def steer_rollout_backward(self, from_node, to_node):
+        """
+        steer_rollout with reversed unicycle steps: every pose is one forward step before the pose ahead of it
+        (from_node for the first one), so driving forward from it gives that pose exactly
+        a forward step yaw' = yaw + dt * w, p' = p + dt * v * (cos yaw, sin yaw) is undone by turning the reversed
+        heading h = yaw' + pi by dt * (-w) first, then moving dt * v along it; PID steers h toward to_node
+        return n*3 array of poses [x, y, yaw], n <= max_steer_step
+        """
+        dis, angle = self.calc_distance_and_angle(from_node, to_node)
+        heading = from_node.yaw + math.pi
+        angle = self.angle_wrap(angle - heading)
+        u = self.pid_control(dis, angle, 0.0, 0.0)
+        prev_dis = dis
+        prev_angle = angle
+
+        x, y = from_node.x, from_node.y
+        poses = []
+        while math.hypot(to_node.x - x, to_node.y - y) > self.dis_threshold and len(poses) < self.max_steer_step:
+            heading += self.delta_time * u[1, 0]
+            x += self.delta_time * u[0, 0] * math.cos(heading)
+            y += self.delta_time * u[0, 0] * math.sin(heading)
+            poses.append((x, y, heading - math.pi))
+
+            dx = to_node.x - x
+            dy = to_node.y - y
+            dis = math.hypot(dx, dy)
+            angle = self.angle_wrap(math.atan2(dy, dx) - heading)
+            u = self.pid_control(dis, angle, dis - prev_dis, angle - prev_angle)
+            prev_dis = dis
+            prev_angle = angle
+        return np.array(poses, dtype=float).reshape(-1, 3)
+
+    def steer_backward(self, from_node, to_node):
+        """
+        steer a goal tree node backward toward to_node, keep the poses before the first infeasible one
+        checks: cc with sigma_x0 (make_goal_tree), in_place, safe_steer of the forward steps (not with lazy_check)
+        return [node, ...], each node the child of the one before in the goal tree
+        """
+        poses = self.steer_rollout_backward(from_node, to_node)
+        if not len(poses):
+            return []
+        xs, ys = poses[:, 0], poses[:, 1]
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints_batch(xs, ys, poses[:, 2])
+            ccs = self.chance_constrain_batch(A, B, self.sigma_x0, self.get_cc_terms_near(xs, ys, self.sigma_x0))
+        ok = ccs < 1.0 - self.p_safe if self.cc_filter else np.ones(len(ccs), dtype=bool)
+        ok &= self.in_place_batch(xs, ys)
+        if not self.lazy_check:
+            # forward steps pose i + 1 -> pose i
+            successors = np.vstack(([[from_node.x, from_node.y]], poses[:-1, :2]))
+            ok &= self.check_steps(xs, ys, successors[:, 0], successors[:, 1])
+        n_feasible = len(poses) if ok.all() else int(np.argmin(ok))
+
+        goal_node_list = []
+        prev = from_node
+        for i in range(n_feasible):
+            node = self.Node(poses[i, 0].item(), poses[i, 1].item(), poses[i, 2].item())
+            node.parent = prev
+            node.depth = prev.depth + 1
+            node.conv = self.sigma_x0
+            node.cc = ccs[i].item()
+            node.time = prev.time + self.delta_time
+            goal_node_list.append(node)
+            prev = node
+        return goal_node_list
+
+    def get_goal_tree_index(self, node):
+        """
+        goal tree node to steer to from node: expected time to get there (distance, heading change on the way and
+        at arrival) plus its time to the goal
+        """
+        tree = self.goal_tree
+        n = len(tree)
+        dx, dy = tree.x[:n] - node.x, tree.y[:n] - node.y
+        bearing = np.arctan2(dy, dx)
+        angle = np.abs(self.angle_wrap_array(bearing - node.yaw)) + np.abs(self.angle_wrap_array(tree.yaw[:n] - bearing))
+        return int(np.argmin(np.hypot(dx, dy) / self.expect_speed + angle / self.expect_turn_rate + tree.time[:n]))
+
+    def connect_trees(self, goal_node):
+        """
+        steer to the new goal tree node goal_node from the forward node that gets there soonest (expected time,
+        as get_goal_tree_index)
+        """
+        xs, ys, yaws, _ = self.get_node_arrays(self.node_list)
+        dx, dy = goal_node.x - xs, goal_node.y - ys
+        bearing = np.arctan2(dy, dx)
+        angle = np.abs(self.angle_wrap_array(bearing - yaws)) + np.abs(self.angle_wrap_array(goal_node.yaw - bearing))
+        dlist = np.hypot(dx, dy) / self.expect_speed + angle / self.expect_turn_rate
+        if self.dominated is not None:
+            dlist[:len(self.dominated)][self.dominated] = math.inf
+        idx = int(np.argmin(dlist))
+        if math.isfinite(dlist[idx]):
+            with self.metric.phase("goal_connect"):
+                self.connect_to_goal_tree(self.node_list[idx], goal_node)
+
+    def connect_to_goal_tree(self, node, target):
+        """
+        join the trees: drive from tree node node to the pose of goal tree node target (join_rollout), then along the
+        goal tree branch target -> goal, whose poses are exact forward steps (steer_rollout_backward), so the path
+        has no jump at the junction
+        the whole path is rolled forward from node with the covariance of the forward tree and gets the checks of
+        check_trajectory, then it goes on the tree and its end on path_end
+        the path ends at its first pose within dis_threshold of the goal like the paths of connect_to_goal, not at
+        the goal pose (the root); when the branch has no such pose, the last stretch is steered to the goal
+        return whether a path was found
+        """
+        tmp_end_node = self.Node(target.x, target.y, 0.0)
+        tmp_end_node.yaw = np.arctan2(
+            tmp_end_node.y - node.y,
+            tmp_end_node.x - node.x,
+        )
+        if not self.angle_check(node, tmp_end_node, self.max_angle_diff):
+            return False
+        self.metric.add("steer_attempts")
+        with self.metric.phase("steer"):
+            poses = self.join_rollout(node, target)
+            if poses is None:
+                return False
+            tree = self.goal_tree
+            chain = []
+            idx = tree.parent[target.index].item()
+            while idx > 0:
+                chain.append(idx)
+                idx = tree.parent[idx].item()
+            poses = np.vstack((poses, np.stack((tree.x[chain], tree.y[chain], tree.yaw[chain]), axis=1)))
+            arrived = np.hypot(self.end.x - poses[:, 0], self.end.y - poses[:, 1]) < self.dis_threshold
+            if arrived.any():
+                poses = poses[:int(np.argmax(arrived)) + 1]
+            convs = self.get_rollout_conv(node, poses)
+            n_feasible, ccs = self.check_trajectory(node, poses, convs)
+            if n_feasible < len(poses):
+                return False
+            node_to_goal_list = self.make_nodes(node, poses, convs, ccs)
+
+            path_end = node_to_goal_list[-1]
+            if self.calc_distance(path_end, self.end) >= self.dis_threshold:
+                node_to_goal_list += self.steer(path_end, self.end, exact_pose=True)
+        if self.calc_distance(node_to_goal_list[-1], self.end) >= self.dis_threshold:
+            return False
+        node_to_goal_list = self.add_to_tree(node_to_goal_list)
+        self.metric.add("tree_connections")
+        return self.add_path_end(node_to_goal_list[-1])
+
+    def join_rollout(self, from_node, to_node):
+        """
+        poses every delta_time along the shortest curvature-bounded path (dubins_path) from from_node to the pose of
+        to_node, driven at up to dubins_speed and dubins_turn_rate (at most max_vehicle_speed and max_vehicle_turn_rate)
+        the last pose is the pose of to_node itself
+        return n*3 array of poses [x, y, yaw], None when it takes more than max_steer_step poses
+        """
+        speed = min(self.dubins_speed, self.max_vehicle_speed)
+        radius = speed / min(self.dubins_turn_rate, self.max_vehicle_turn_rate)
+        segments = self.dubins_path(from_node.x, from_node.y, from_node.yaw, to_node.x, to_node.y, to_node.yaw, radius)
+        s = self.dubins_steps(segments, speed * self.delta_time)
+        if not 0 < len(s) <= self.max_steer_step:
+            return None
+        poses = self.dubins_poses(from_node.x, from_node.y, from_node.yaw, segments, radius, s)
+        poses[-1] = (to_node.x, to_node.y, to_node.yaw)  # no rounding error at the junction
+        return poses
+
+    @staticmethod
+    def dubins_path(x0, y0, yaw0, x1, y1, yaw1, radius):
+        """
+        shortest path from pose 0 to pose 1 with turn radius >= radius (Dubins: the shortest of LSL, RSR, LSR,
+        RSL, RLR, LRL)
+        return [(turn, length), ...], turn 1: left, -1: right, 0: straight, length in m
+        """
+        def mod(angle):
+            angle %= 2 * math.pi
+            return 0.0 if angle > 2 * math.pi - 1e-9 else angle
+
+        dx, dy = x1 - x0, y1 - y0
+        d = math.hypot(dx, dy) / radius
+        theta = math.atan2(dy, dx)
+        a, b = mod(yaw0 - theta), mod(yaw1 - theta)
+        sa, ca, sb, cb = math.sin(a), math.cos(a), math.sin(b), math.cos(b)
+        c_ab = math.cos(a - b)
+
+        words = []  # (turns, lengths in radius)
+        p2 = 2 + d * d - 2 * c_ab + 2 * d * (sa - sb)
+        if p2 >= 0:
+            tmp = math.atan2(cb - ca, d + sa - sb)
+            words.append(((1, 0, 1), (mod(tmp - a), math.sqrt(p2), mod(b - tmp))))
+        p2 = 2 + d * d - 2 * c_ab + 2 * d * (sb - sa)
+        if p2 >= 0:
+            tmp = math.atan2(ca - cb, d - sa + sb)
+            words.append(((-1, 0, -1), (mod(a - tmp), math.sqrt(p2), mod(tmp - b))))
+        p2 = -2 + d * d + 2 * c_ab + 2 * d * (sa + sb)
+        if p2 >= 0:
+            p = math.sqrt(p2)
+            tmp = math.atan2(-ca - cb, d + sa + sb) - math.atan2(-2.0, p)
+            words.append(((1, 0, -1), (mod(tmp - a), p, mod(tmp - b))))
+        p2 = -2 + d * d + 2 * c_ab - 2 * d * (sa + sb)
+        if p2 >= 0:
+            p = math.sqrt(p2)
+            tmp = math.atan2(ca + cb, d - sa - sb) - math.atan2(2.0, p)
+            words.append(((-1, 0, 1), (mod(a - tmp), p, mod(b - tmp))))
+        tmp = (6 - d * d + 2 * c_ab + 2 * d * (sa - sb)) / 8
+        if abs(tmp) <= 1:
+            p = mod(2 * math.pi - math.acos(tmp))
+            t = mod(a - math.atan2(ca - cb, d - sa + sb) + p / 2)
+            words.append(((-1, 1, -1), (t, p, mod(a - b - t + p))))
+        tmp = (6 - d * d + 2 * c_ab + 2 * d * (sb - sa)) / 8
+        if abs(tmp) <= 1:
+            p = mod(2 * math.pi - math.acos(tmp))
+            t = mod(-a - math.atan2(ca - cb, d + sa - sb) + p / 2)
+            words.append(((1, -1, 1), (t, p, mod(b - a - t + p))))
+
+        turns, lengths = min(words, key=lambda word: sum(word[1]))
+        return [(turn, length * radius) for turn, length in zip(turns, lengths)]
+
+    @staticmethod
+    def dubins_steps(segments, step):
+        """
+        arc lengths of the poses along segments (dubins_path), at most step apart
+        every segment is cut into equal steps of its own, so a step is a single arc or line that the car drives in
+        one delta_time at constant speed and turn rate
+        """
+        s = [np.zeros(0)]
+        start = 0.0
+        for _, length in segments:
+            n_step = math.ceil(length / step - 1e-9)
+            s.append(start + length * np.arange(1, n_step + 1) / max(n_step, 1))
+            start += length
+        return np.concatenate(s)
+
+    @staticmethod
+    def dubins_poses(x0, y0, yaw0, segments, radius, s):
+        """
+        poses at the arc lengths s (array) along segments (dubins_path) from pose 0, n*3
+        """
+        xs, ys, yaws = np.full(len(s), float(x0)), np.full(len(s), float(y0)), np.full(len(s), float(yaw0))
+        start = 0.0
+        for turn, length in segments:
+            ds = np.clip(s - start, 0.0, length)  # part of every pose's arc length on this segment
+            if turn:
+                end_yaws = yaws + turn * ds / radius
+                xs += turn * radius * (np.sin(end_yaws) - np.sin(yaws))
+                ys -= turn * radius * (np.cos(end_yaws) - np.cos(yaws))
+                yaws = end_yaws
+            else:
+                xs += ds * np.cos(yaws)
+                ys += ds * np.sin(yaws)
+            start += length
+        return np.stack((xs, ys, yaws), axis=1)
+
+    def vehicle_constraints(self, x, y, yaw):
+        """
+        calculate vehicle's edge constraints
+        return ([a_1, a_2, a_3, a_4], [b1, b2, b3, b4])
+        a_i is the unit outward normals of line constraint 单位外法向量
+        b_i = a_i^T * x (x is on the line)
+        """
+        # deal with angle = 0.0 pi/2 -pi/2 pi -pi
+        # d_ang = np.deg2rad(3.0)
+        # if abs(yaw) - 0.0 < d_ang:
+        #     sign = 1 if yaw >= 0.0 else -1
+        #     yaw = sign * d_ang
+        # elif np.pi - abs(yaw) < d_ang:
+        #     yaw = np.sign(yaw) * (np.pi - d_ang)
+        # elif abs(np.pi / 2 - abs(yaw)) < d_ang:
+        #     sign = 1 if np.pi / 2 - abs(yaw) >= 0.0 else -1
+        #     yaw = np.sign(yaw) * (np.pi / 2 - sign * d_ang)
+
+        # nodes in counterclockwise
+        w = self.car.w / 2.0
+        p0 = [
+            x + self.car.l_f * math.cos(yaw) + w * math.sin(yaw),
+            y + self.car.l_f * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        p1 = [
+            x + self.car.l_f * math.cos(yaw) - w * math.sin(yaw),
+            y + self.car.l_f * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p2 = [
+            x - self.car.l_r * math.cos(yaw) - w * math.sin(yaw),
+            y - self.car.l_r * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p3 = [
+            x - self.car.l_r * math.cos(yaw) + w * math.sin(yaw),
+            y - self.car.l_r * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        # calculate k and b
+        # kx + b = y => kx - y + b = 0
+        # k = (y1-y2)/(x1-x2) b = (y2x1-y1x2)/(x1-x2)
+
+        a1 = [p0[0] - p3[0], p0[1] - p3[1], 0.0]  # 单位外法向量
+        d = math.sqrt(a1[0] ** 2 + a1[1] ** 2)
+        a1 = [i / d for i in a1]
+        b1 = a1[0] * p0[0] + a1[1] * p0[1]
+
+        a2 = [p1[0] - p0[0], p1[1] - p0[1], 0.0]  # 单位外法向量
+        d = math.sqrt(a2[0] ** 2 + a2[1] ** 2)
+        a2 = [i / d for i in a2]
+        b2 = a2[0] * p1[0] + a2[1] * p1[1]
+
+        a3 = [p2[0] - p1[0], p2[1] - p1[1], 0.0]  # 单位外法向量
+        d = math.sqrt(a3[0] ** 2 + a3[1] ** 2)
+        a3 = [i / d for i in a3]
+        b3 = a3[0] * p2[0] + a3[1] * p2[1]
+
+        a4 = [p3[0] - p2[0], p3[1] - p2[1], 0.0]  # 单位外法向量
+        d = math.sqrt(a4[0] ** 2 + a4[1] ** 2)
+        a4 = [i / d for i in a4]
+        b4 = a4[0] * p3[0] + a4[1] * p3[1]
+
+        return ([a1, a2, a3, a4], [b1, b2, b3, b4])
+
+    def get_chance_constrain(self, current):
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints(current.x, current.y, current.yaw)
+            return self.chance_constrain_batch(A, B, current.conv,
+                                               self.get_cc_terms_near(current.x, current.y, current.conv))
+
+    def get_cc_terms_near(self, xs, ys, conv):
+        """
+        cc terms (get_obstacle_cc_terms) of the obstacles that may add cc_cull_eps or more to the chance constraint
+        of a vehicle at any of the points (xs, ys) with covariance conv (3*3 or n*3*3)
+        for unit a: a^T (conv + abs_mat_j) a <= trace(conv[:2, :2]) + cc_spread_j, and an obstacle center at distance R
+        is at least R / sqrt(2) - h outside one edge of the vehicle (h: the largest of l_f, l_r, w / 2)
+        so cc_j < eps for R >= sqrt(2) * (h + erfinv(1 - 2 eps) * sqrt(2 * (trace + cc_spread_j)))
+        """
+        geometry = self.cc_geometry
+        if not self.cc_cull_eps or len(geometry) < geometry.broad_phase_min:
+            return geometry.cc_terms
+        conv = np.asarray(conv)
+        trace = np.max(conv[..., 0, 0] + conv[..., 1, 1])
+        h = max(self.car.l_f, self.car.l_r, self.car.w / 2.0)
+        # erfinv(1 - 2 eps) without the rounding of 1 - 2 eps
+        reach = math.sqrt(2.0) * (h + erfcinv(2.0 * self.cc_cull_eps) * np.sqrt(2.0 * (trace + geometry.cc_spread)))
+        ks = geometry.candidates(xs, ys, reach)
+        if len(ks) == len(geometry):
+            return geometry.cc_terms
+        x, abs_mat = geometry.cc_terms
+        return x[ks], abs_mat[ks]
+
+    @staticmethod
+    def get_obstacle_cc_terms(obstacle_list):
+        """
+        obstacle terms for chance_constrain_batch
+        return (x, abs_mat): obstacle centers [x, y, 0.0] as K*3*1, obstacle uncertainty abs_mat as K*3*3
+        abs_mat is added to the node covariance, its diagonal is the half axes projected on x / y (and yaw)
+        """
+        x = np.zeros((len(obstacle_list), 3, 1))
+        abs_mat = np.zeros((len(obstacle_list), 3, 3))
+        for j, obs in enumerate(obstacle_list):
+            angle = abs(obs[4])
+            angle = angle if angle <= math.pi / 2.0 else math.pi - angle
+            x[j, :, 0] = [obs[0], obs[1], 0.0]
+            abs_mat[j] = np.diag([obs[3] * math.sin(angle) + obs[2] * math.cos(angle),
+                                  obs[2] * math.sin(angle) + obs[3] * math.cos(angle), obs[4]])
+        return x, abs_mat
+
+    @staticmethod
+    def chance_constrain_batch(A, B, conv, obstacle_cc_terms):
+        """
+        chance constraint of vehicle poses against all obstacles, all (obstacle, edge) pairs in one go
+        A: 4 unit outward edge normals, B: 4 edge offsets (from vehicle_constraints), conv: 3*3 node covariance
+        or for n poses at once A: n*4*3, B: n*4, conv: n*3*3 or 3*3 (vehicle_constraints_batch)
+        obstacle_cc_terms: from get_obstacle_cc_terms
+        cc_jk = 0.5 * (1 - erf((a_k^T x_j - b_k) / sqrt(2 a_k^T (conv + abs_mat_j) a_k)))
+        return sum_j min_k cc_jk (an n array for n poses)
+        the products are stacked 1*3 matrix products and the sum is sequential,
+        so the result is the same as evaluating the pairs one by one
+        """
+        x, abs_mat = obstacle_cc_terms
+        A = np.asarray(A, dtype=float)
+        B = np.asarray(B, dtype=float)
+        batch_shape = A.shape[:-2]
+        if not len(x):
+            return np.zeros(batch_shape) if batch_shape else 0
+        a = A[..., None, :, None, :]  # (n)*1*4*1*3
+        sigma = (np.asarray(conv)[..., None, :, :] + abs_mat)[..., None, :, :]  # (n)*K*1*3*3
+        ax = np.matmul(a, x[:, None])[..., 0, 0]  # (n)*K*4
+        a_sigma_a = np.matmul(np.matmul(a, sigma), a.swapaxes(-1, -2))[..., 0, 0]  # (n)*K*4
+        erf_item = (ax - B[..., None, :]) / np.sqrt(2 * a_sigma_a)
+        cc = 0.5 * (1 - erf(erf_item))
+        delta_t = np.cumsum(cc.min(axis=-1), axis=-1)[..., -1]
+        return delta_t if batch_shape else delta_t.item()
+
+    def get_path_chance_constrain(self, path, obstacle_list):
+        """
+        cc of every node of path (with the node covariance) against another obstacle list, e.g. the perceived one
+        """
+        if not len(path):
+            return []
+        A, B = self.vehicle_constraints_batch([node.x for node in path], [node.y for node in path],
+                                              [node.yaw for node in path])
+        convs = np.array([node.conv for node in path])
+        return self.chance_constrain_batch(A, B, convs, self.get_obstacle_geometry(obstacle_list).cc_terms).tolist()
+
+    def check_chance_constrain(self, current, p_safe):
+        return self.get_chance_constrain(current) < 1 - p_safe
+
+    def calc_dist_to_goal(self, x, y):
+        dx = x - self.end.x
+        dy = y - self.end.y
+        return math.hypot(dx, dy)
+
+    def get_neighbour_grid(self):
+        """
+        NeighbourGrid of the current tree, a new one for a new tree
+        """
+        if self.neighbour_grid is None or self.neighbour_grid.tree is not self.node_list:
+            self.neighbour_grid = self.NeighbourGrid(self.node_list, self.rewire_radius)
+        return self.neighbour_grid
+
+    def get_steps(self, idx, near):
+        """
+        single steering steps between tree node idx and the tree nodes near, masks (near -> idx, idx -> near)
+        a step goes no farther than rewire_radius, in the direction of the heading of its parent (up to
+        rewire_heading_tol) and turns no more than rewire_max_turn
+        the steered trajectories are not exact between any two poses, so rewiring only uses single steps
+        """
+        tree = self.node_list
+        dx, dy = tree.x[near] - tree.x[idx], tree.y[near] - tree.y[idx]
+        dis = np.hypot(dx, dy)
+        yaw, near_yaw = tree.yaw[idx].item(), tree.yaw[near]
+        step = (dis > 0.0) & (dis <= self.rewire_radius) & (np.cos(near_yaw - yaw) >= math.cos(self.rewire_max_turn))
+        # angle between step and parent heading <= tol  <=>  step . heading >= cos(tol) * dis
+        min_dot = math.cos(self.rewire_heading_tol) * dis
+        from_near = step & (-(dx * np.cos(near_yaw) + dy * np.sin(near_yaw)) >= min_dot)
+        to_near = step & (dx * math.cos(yaw) + dy * math.sin(yaw) >= min_dot)
+        return from_near, to_near
+
+    def get_step_conv(self, parents):
+        """
+        covariance after one steering step from each of the tree nodes parents (n*3*3), as steer propagates it
+        """
+        tree = self.node_list
+        depth = tree.depth[parents] + 1
+        if tree.conv is None:
+            if len(depth):
+                self.conv_cache.get(int(depth.max()))
+            return self.conv_cache.table[depth]
+        J2 = np.zeros((len(parents), 3, 2))
+        J2[:, 0, 0] = self.delta_time * np.cos(tree.yaw[parents])
+        J2[:, 1, 0] = self.delta_time * np.sin(tree.yaw[parents])
+        J2[:, 2, 1] = self.delta_time
+        return tree.conv[parents] + J2 @ self.sigma_control @ J2.transpose(0, 2, 1) + self.sigma_pose
+
+    def rewire_node(self, idx):
+        """
+        rrt* rewiring of the new tree node idx within rewire_radius (get_neighbour_grid)
+        choose parent: the neighbour that gives idx the lowest cost to come (get_step_costs)
+        rewire: neighbours that get a lower cost to come with idx as parent move under it
+        the cost to come sums the cc along the path like backpropogation does, node.cost alone would trade a shorter
+        path for a riskier one
+        every move is checked like steering (reparent), the new costs are propagated through the moved subtrees
+        return whether a moved subtree has a path in path_end (the path scores need rescore_paths)
+        """
+        tree = self.node_list
+        near = self.get_neighbour_grid().query(tree.x[idx], tree.y[idx], self.rewire_radius)
+        near = near[near != idx]
+        if not len(near):
+            return False
+        moved_paths = False
+        from_near, to_near = self.get_steps(idx, near)
+
+        # choose parent, a shallower node only (no cycle: the subtree of idx is deeper)
+        parents = near[from_near & (tree.depth[near] + 1 < tree.depth[idx])]
+        if len(parents):
+            costs = self.get_step_costs(parents, np.full(len(parents), idx))
+            for i in np.argsort(costs, kind="stable"):
+                if costs[i] >= self.get_cost_to_come(idx):
+                    break
+                on_path = math.isfinite(tree.cost_ub[idx])
+                if self.reparent(idx, parents[i]):
+                    moved_paths |= on_path
+                    break
+
+        # rewire the neighbours through idx, deeper nodes only (no ancestor of idx)
+        children = near[to_near & (tree.depth[idx] + 1 < tree.depth[near])]
+        if len(children):
+            costs = self.get_step_costs(np.full(len(children), idx), children)
+            moved = False
+            for child in children[costs < self.get_cost_to_come(children)]:
+                # an earlier move may have moved child too
+                if moved and (tree.depth[idx] + 1 >= tree.depth[child] or
+                              self.get_step_costs([idx], [child])[0] >= self.get_cost_to_come(child)):
+                    continue
+                on_path = math.isfinite(tree.cost_ub[child])
+                if self.reparent(child, idx):
+                    moved = True
+                    moved_paths |= on_path
+        return moved_paths
+
+    def get_cost_to_come(self, idx):
+        """
+        get_cost of the path from the root to the tree node(s) idx: time and the cc summed along the path
+        """
+        return self.get_cost(self.node_list.time[idx], self.node_list.cc_sum[idx])
+
+    def accumulate_cc(self, nodes):
+        """
+        cc_sum of the tree nodes nodes (closed under children, e.g. a subtree) from the cc_sum of the parents
+        above them, level by level (depth)
+        """
+        tree = self.node_list
+        for level in tree.levels(nodes):
+            parents = tree.parent[level]
+            tree.cc_sum[level] = np.where(parents >= 0, tree.cc_sum[np.maximum(parents, 0)], 0.0) + tree.cc[level]
+
+    def get_step_costs(self, parents, idx):
+        """
+        cost to come (get_cost_to_come) of the tree nodes idx if they were one steering step from the tree nodes
+        parents, the cc follows the covariance after the step
+        """
+        tree = self.node_list
+        convs = self.get_step_conv(parents)
+        xs, ys = tree.x[idx], tree.y[idx]
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints_batch(xs, ys, tree.yaw[idx])
+            ccs = self.chance_constrain_batch(A, B, convs, self.get_cc_terms_near(xs, ys, convs))
+        return self.get_cost(tree.time[parents] + self.delta_time, tree.cc_sum[parents] + ccs)
+
+    def reparent(self, idx, parent):
+        """
+        move tree node idx with its subtree under parent (one steering step) if the step passes safe_steer and every
+        moved node keeps the chance constraint with its new covariance, see propagate_cost_to_leaves
+        return whether it was moved
+        """
+        tree = self.node_list
+        if not self.check_steps(tree.x[[parent]], tree.y[[parent]], tree.x[[idx]], tree.y[[idx]])[0]:
+            return False
+        if not self.propagate_cost_to_leaves(idx, parent):
+            return False
+        self.metric.add("rewires")
+        return True
+
+    def propagate_cost_to_leaves(self, idx, parent):
+        """
+        depth, time, covariance, cc, cc_sum and cost of node idx and every node below it when idx is one step from
+        parent, with J1 = I the steps add the same to depth, time and covariance of the whole subtree, so it is
+        shifted in one batch, only the cc is computed again
+        nothing changes if a node breaks the chance constraint (cc_filter), return whether idx was moved
+        """
+        tree = self.node_list
+        subtree = np.array(tree.subtree(idx), dtype=np.int64)
+        depth = tree.depth[subtree] + (tree.depth[parent] + 1 - tree.depth[idx])
+        times = tree.time[subtree] + (tree.time[parent] + self.delta_time - tree.time[idx])
+        if tree.conv is None:
+            self.conv_cache.get(int(depth.max()))
+            convs = self.conv_cache.table[depth]
+        else:
+            convs = tree.conv[subtree] + (self.get_step_conv([parent])[0] - tree.conv[idx])
+        xs, ys = tree.x[subtree], tree.y[subtree]
+        with self.metric.phase("cc"):
+            A, B = self.vehicle_constraints_batch(xs, ys, tree.yaw[subtree])
+            ccs = self.chance_constrain_batch(A, B, convs, self.get_cc_terms_near(xs, ys, convs))
+        if self.cc_filter and np.any(ccs >= 1.0 - self.p_safe):
+            return False
+
+        tree.set_parent(idx, parent)
+        tree.depth[subtree] = depth
+        tree.time[subtree] = times
+        if tree.conv is not None:
+            tree.conv[subtree] = convs
+        tree.cc[subtree] = ccs
+        tree.cost[subtree] = self.get_cost(times, ccs)
+        self.accumulate_cc(subtree)
+        return True
+
+    # 这个函数和rrt也有区别
+    def get_heuristic_dis(self, from_node, to_node):
+        """
+        heuristic distance function
+        """
+        dis, angle = self.calc_distance_and_angle(from_node, to_node)
+        angle = abs(self.angle_wrap(angle - from_node.yaw))
+        # heu fun
+        t = self.rng.random()
+        if len(self.path_end) < self.n_path_when_change_strategy:
+            if t < self.k_dis_explore:
+                return dis / self.expect_speed + angle / self.expect_turn_rate
+            else:
+                return from_node.cost
+        else:
+            if t < self.k_dis_exploit:
+                return dis / self.expect_speed + angle / self.expect_turn_rate
+            else:
+                return from_node.cost
+
+    def get_heuristic_dis_batch(self, node_list, to_node):
+        """
+        heuristic distance from every node in node_list to to_node, same as get_heuristic_dis
+        each node draws its own strategy (distance or node cost) with one random number
+        """
+        xs, ys, yaws, costs = self.get_node_arrays(node_list)
+        dx = to_node.x - xs
+        dy = to_node.y - ys
+        dis = np.hypot(dx, dy)
+        angle = np.abs(self.angle_wrap_array(np.arctan2(dy, dx) - yaws))
+        if len(self.path_end) < self.n_path_when_change_strategy:
+            k_dis = self.k_dis_explore
+        else:
+            k_dis = self.k_dis_exploit
+        use_dis = self.rng.random(len(xs)) < k_dis
+        return np.where(use_dis, dis / self.expect_speed + angle / self.expect_turn_rate, costs)
+
+    def get_node_arrays(self, node_list):
+        """
+        x, y, yaw, cost of node_list as arrays
+        for a Tree these are views of the tree storage, no copy
+        """
+        if isinstance(node_list, self.Tree):
+            n = len(node_list)
+            return node_list.x[:n], node_list.y[:n], node_list.yaw[:n], node_list.cost[:n]
+        states = np.array([[node.x, node.y, node.yaw, node.cost] for node in node_list]).reshape(-1, 4)
+        return states[:, 0], states[:, 1], states[:, 2], states[:, 3]
+
+    def get_expect_time_to_goal(self, from_node):
+        dis, angle = self.calc_distance_and_angle(from_node, self.end)
+        angle = abs(self.angle_wrap(angle - from_node.yaw))
+        return (1 - self.k_dis_when_no_path) * from_node.cost + self.k_dis_when_no_path * (
+                    dis / self.expect_speed + angle / self.expect_turn_rate)
+
+    def get_cost_lb(self, node):
+        """
+        cost lower bound is the expected driving time from current node to the goal
+        """
+        dis, angle = self.calc_distance_and_angle(node, self.end)
+        angle = abs(self.angle_wrap(angle - node.yaw))
+        return dis / self.expect_speed + angle / self.expect_turn_rate
+
+    def backpropogation(self, node):
+        """
+        backpropogation to update cost-upper-bound of a path from start to goal
+        the first node is the closest to the goal
+        the path scores of the best path choice are updated on the way, see update_path_scores
+        """
+        min_child_upper_bound = math.inf  # record lowest cost-upper-bound from a node to its childs
+        # update upper bound
+
+        # back from root to goal
+        # while node is not None and self.calc_distance(node, self.end) < self.dis_threshold: # for nodes in the goal region
+        #     node.cost_ub = node.cost_lb
+        #     min_child_upper_bound = min(min_child_upper_bound, node.cost + node.cost_ub)
+        #     node = node.parent
+        # while node is not None: # for nodes out of the goal region
+        #     node.cost_ub = min(min_child_upper_bound, node.cost_ub)
+        #     min_child_upper_bound = min(min_child_upper_bound, node.cost + node.cost_ub)
+        #     node = node.parent
+
+        # back from goal to root
+        chain = []  # tree indices of the walked nodes, for update_path_scores
+        while node is not None and self.calc_distance(node,
+                                                      self.end) < self.dis_threshold:  # for nodes in the goal region
+            node.cost_ub = node.cost_lb
+            min_child_upper_bound = min(min_child_upper_bound + self.delta_time, node.cost_ub)
+            chain.append(node.index)
+            node = node.parent
+        while node is not None:  # for nodes out of the goal region
+            node.cost_ub = min(min_child_upper_bound + self.delta_time + node.cc * self.k_cc, node.cost_ub)
+            min_child_upper_bound = min(min_child_upper_bound + self.delta_time, node.cost_ub)
+            chain.append(node.index)
+            node = node.parent
+        self.update_path_scores(chain)
+
+    def get_nearest_node_index(self, node_list, rnd_node, n_nearest=1, n_step=0):
+        """
+        sort tree node according to heuristic, ascending
+        get node from sorted nodes ids, node_ids = [0, n_step, 2*n_step, ...]
+        if n_nearest = 1, choose the nearest node (return one node [node_id])
+        else return node_ids[:n_nearest]
+        """
+        # dlist = [(node.x - rnd_node.x) ** 2 + (node.y - rnd_node.y)
+        #          ** 2 for node in node_list]
+        # dlist = [self.get_heuristic_dis(node, rnd_node) for node in node_list]
+        dlist = self.get_heuristic_dis_batch(node_list, rnd_node)
+        if node_list is self.node_list and self.dominated is not None:
+            # branch and bound: bounded nodes go last, the caller skips them
+            dlist[:len(self.dominated)][self.dominated] = math.inf
+        if n_nearest > 1:
+            if not len(dlist) > n_nearest:
+                return np.argsort(dlist)
+            # only the ranks [0, n_step, 2*n_step, ...][:n_nearest] are needed, no full sort
+            kth = np.arange(0, len(dlist), max(n_step, 1))[:n_nearest]
+            return np.argpartition(dlist, kth)[kth]
+        else:
+            return [int(np.argmin(dlist))]
+
+    def get_close_to_goal_index(self, node_list):
+        """
+        get the node close to goal, get_expect_time_to_goal of all nodes at once
+        """
+        xs, ys, yaws, costs = self.get_node_arrays(node_list)
+        dx = self.end.x - xs
+        dy = self.end.y - ys
+        dis = np.hypot(dx, dy)
+        angle = np.abs(self.angle_wrap_array(np.arctan2(dy, dx) - yaws))
+        dlist = (1 - self.k_dis_when_no_path) * costs + self.k_dis_when_no_path * (
+                dis / self.expect_speed + angle / self.expect_turn_rate)
+        return int(np.argmin(dlist))
+
+    def get_random_node(self):
+        """
+        node sampling, x in [min_rand_x, max_rand_x], y in [min_rand_y, end.y + 10], outside all obstacles
+        samples are served from a buffer of obstacle free points, see fill_sample_buffer
+        """
+        # if random.randint(0, 100) > self.goal_sample_rate:
+        #     while True:
+        #         rnd = self.Node(random.uniform(self.min_rand, self.max_rand),
+        #                         random.uniform(self.min_rand, self.max_rand),
+        #                         0.0)
+        #         valid = True
+        #         # discard point in obstacle range
+        #         for obs in self.obstacle_list:
+        #             a = ((rnd.x - obs[0]) * math.cos(obs[4]) + (rnd.y - obs[1]) * math.sin(obs[4]))**2 / obs[2]**2
+        #             b = ((obs[0] - rnd.x) * math.sin(obs[4]) + (rnd.y - obs[1]) * math.cos(obs[4]))**2 / obs[3]**2
+        #             if a + b <= 1:
+        #                 valid = False
+        #                 break
+        #         if valid:
+        #             break
+        # else:  # goal point sampling
+        #     rnd = self.Node(self.end.x, self.end.y, 0.0)
+        max_y = self.max_rand_y if self.sample_goal_margin is None else self.end.y + self.sample_goal_margin
+        bounds = (self.min_rand_x, self.max_rand_x, self.min_rand_y, max_y)
+        if self.sample_index >= len(self.sample_buffer) or self.sample_bounds != bounds:
+            self.fill_sample_buffer(bounds)
+        x, y = self.sample_buffer[self.sample_index]
+        self.sample_index += 1
+        return self.Node(x.item(), y.item(), 0.0)
+
+    def fill_sample_buffer(self, bounds):
+        """
+        draw sample_block_size uniform points in bounds [x-min, x-max, y-min, y-max] at once and keep the ones
+        outside all obstacles (one vectorized containment test), draw again if all of them are rejected
+        """
+        min_x, max_x, min_y, max_y = bounds
+        while True:
+            xs = self.rng.uniform(min_x, max_x, self.sample_block_size)
+            ys = self.rng.uniform(min_y, max_y, self.sample_block_size)
+            # discard point in obstacle range
+            free = ~self.obstacle_geometry.contains_any(xs, ys)
+            self.metric.add("samples_rejected", len(free) - np.count_nonzero(free))
+            if free.any():
+                break
+        self.sample_buffer = np.column_stack((xs[free], ys[free]))
+        self.sample_index = 0
+        self.sample_bounds = bounds
+
+    def get_cost(self, time, chance_constraint):
+        return time + chance_constraint * self.k_cc
+
+    def angle_check(self, node1, node2, max_angle):
+        return np.abs(self.angle_wrap(node1.yaw - node2.yaw)) <= max_angle
+
+    def is_node_in_vehicle(self, node, vehicle):
+        """
+        判断点是否在 vehicle 的 bbox(2D 矩形) 范围内
+        vehicle: [x, y, long half axis, short half axis, yaw], the point is moved into the bbox frame
+        """
+        return bool(self.ObstacleGeometry.points_in_rects([node.x], [node.y], vehicle[0], vehicle[1],
+                                                          math.cos(vehicle[4]), math.sin(vehicle[4]),
+                                                          vehicle[2], vehicle[3])[0, 0])
+
+    def get_obstacle_geometry(self, obstacle_list):
+        """
+        ObstacleGeometry of obstacle_list, built once per list
+        obstacle lists are not changed after they are given to the planner, so the list object is the key
+        """
+        if obstacle_list is self.obstacle_list:
+            return self.obstacle_geometry
+        geometry = self.obstacle_geometry_cache.get(id(obstacle_list))
+        if geometry is None or geometry.obstacle_list is not obstacle_list:
+            geometry = self.ObstacleGeometry(obstacle_list)
+            self.obstacle_geometry_cache[id(obstacle_list)] = geometry
+        return geometry
+
+    def in_place(self, node):
+        """
+        check if a node in planning place
+        """
+        valid = node.x < self.max_rand_x and node.x > self.min_rand_x and \
+                node.y < self.max_rand_y and node.y > self.min_rand_y
+        if not valid:
+            return False
+        # check collision to vehicle bbox
+        return not self.obstacle_geometry.hits_any(node.x, node.y)
+
+    def in_place_batch(self, xs, ys):
+        """
+        in_place for arrays of points, return a mask
+        """
+        xs = np.asarray(xs, dtype=float)
+        ys = np.asarray(ys, dtype=float)
+        valid = (xs < self.max_rand_x) & (xs > self.min_rand_x) & (ys < self.max_rand_y) & (ys > self.min_rand_y)
+        return valid & ~self.obstacle_geometry.contains_any(xs, ys)
+
+    def egocar_to_obs(self, ego_car_node):
+        return [ego_car_node.x, ego_car_node.y, 4.51 / 2, 1.0, ego_car_node.yaw]
+
+    def ego_car_corners_batch(self, xs, ys, yaws):
+        """
+        the four corners of the ego car (self.car) at each pose, n*4*2
+        """
+        xs, ys, yaws = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), np.asarray(yaws, dtype=float)
+        w = self.car.w / 2.0
+        cos, sin = np.cos(yaws), np.sin(yaws)
+        p = np.array([
+            [xs + self.car.l_f * cos + w * sin, ys + self.car.l_f * sin - w * cos],
+            [xs + self.car.l_f * cos - w * sin, ys + self.car.l_f * sin + w * cos],
+            [xs - self.car.l_r * cos - w * sin, ys - self.car.l_r * sin + w * cos],
+            [xs - self.car.l_r * cos + w * sin, ys - self.car.l_r * sin - w * cos],
+        ])  # 4 * 2 * n
+        return p.transpose(2, 0, 1)
+
+    def obstacle_corners_in_ego(self, xs, ys, yaws, geometry):
+        """
+        n*K*4 mask, corner of obstacle k inside the ego bbox (egocar_to_obs) at pose i
+        """
+        xs, ys, yaws = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), np.asarray(yaws, dtype=float)
+        _, _, half_length, half_width, _ = self.egocar_to_obs(self.start)  # only the bbox size is used
+        corners = geometry.corners[:, :4].reshape(-1, 2)  # 4K points
+        mask = self.ObstacleGeometry.points_in_rects(corners[:, 0], corners[:, 1], xs, ys, np.cos(yaws), np.sin(yaws),
+                                                     half_length, half_width)  # 4K * n
+        return mask.T.reshape(len(xs), len(geometry), 4)
+
+    # 这里添加一个碰撞检测的函数，我的意图是检测障碍物是不是在车里
+    def peng_zhuang_jian_ce_oie(self, ego_car_node,list_for_check):  # obs是障碍物列表，第二个参数也是节点，在函数内部我会将它转化为障碍物那样的列表
+        # 障碍物四个角点来自 ObstacleGeometry, 一次检测所有角点是否在自车 bbox 中
+        geometry = self.get_obstacle_geometry(list_for_check)
+        mask = self.obstacle_corners_in_ego([ego_car_node.x], [ego_car_node.y], [ego_car_node.yaw], geometry)
+        return int(mask.sum())
+
+    # 碰撞检测，车是否在障碍物中
+    def peng_zhuang_jian_ce_eio(self, current,list_for_check):  # 这里的current就是ego_car_node
+        geometry = self.get_obstacle_geometry(list_for_check)
+        # 自车四个角点，一次检测是否在各障碍物中
+        corners = self.ego_car_corners_batch([current.x], [current.y], [current.yaw])[0]
+        return int(geometry.contains(corners[:, 0], corners[:, 1]).sum())
+
+    def peng_zhuang_jian_ce_batch(self, xs, ys, yaws, list_for_check):
+        """
+        collision of n ego car poses with an obstacle list, return an n mask (True: collision)
+        exact rectangle overlap (separating axis test, ObstacleGeometry.overlaps), all poses and obstacles at once
+        """
+        with self.metric.phase("collision"):
+            geometry = self.get_obstacle_geometry(list_for_check)
+            return self.ego_car_overlaps(xs, ys, yaws, geometry).any(axis=1)
+
+    def ego_car_overlaps(self, xs, ys, yaws, geometry):
+        """
+        n*len(ks) mask, the ego car at pose i overlaps obstacle ks[j] of geometry
+        the footprint is the union of the self.car bbox and the egocar_to_obs bbox (centered on the pose),
+        the same two boxes as the corner tests peng_zhuang_jian_ce_eio and peng_zhuang_jian_ce_oie
+        broad phase: ks are the obstacles whose bounding circle meets the footprint's bounding circle at some pose
+        """
+        xs, ys, yaws = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float), np.asarray(yaws, dtype=float)
+        cos, sin = np.cos(yaws), np.sin(yaws)
+        shift = (self.car.l_f - self.car.l_r) / 2.0  # bbox center is ahead of the pose when l_f > l_r
+        half_length, half_width = (self.car.l_f + self.car.l_r) / 2.0, self.car.w / 2.0
+        _, _, box_half_length, box_half_width, _ = self.egocar_to_obs(self.start)  # only the bbox size is used
+        reach = max(abs(shift) + math.hypot(half_length, half_width), math.hypot(box_half_length, box_half_width))
+        ks = geometry.candidates(xs, ys, geometry.radius + reach * (1.0 + 1e-9))
+        car = geometry.overlaps(xs + shift * cos, ys + shift * sin, cos, sin, half_length, half_width, ks)
+        return car | geometry.overlaps(xs, ys, cos, sin, box_half_length, box_half_width, ks)
+
+    # 碰撞检测，将车是否在障碍物中和障碍物是否在车中进行总和
+    def peng_zhuang_jian_ce(self, ego_car_node,list_for_check):
+        # 分离轴检测代替了角点检测 (peng_zhuang_jian_ce_oie / eio)，也能发现只有边相交的碰撞
+        return bool(self.peng_zhuang_jian_ce_batch([ego_car_node.x], [ego_car_node.y], [ego_car_node.yaw],
+                                                   list_for_check)[0])
+
+    def safe_steer(self, node):
+        if node.parent:
+            xs, ys, jiaodu = self.safe_steer_points(node.parent.x, node.parent.y, node.x, node.y)
+            yaws = np.full(len(xs), jiaodu)
+            #碰撞检测
+            if self.peng_zhuang_jian_ce_batch(xs, ys, yaws, self.collision_obstacle_list).any():
+                return False
+            #cc检测
+            if not self.cc_filter:
+                return True
+            with self.metric.phase("cc"):
+                A, B = self.vehicle_constraints_batch(xs, ys, yaws)
+                ccs = self.chance_constrain_batch(A, B, self.Node.zero_conv,
+                                                  self.get_cc_terms_near(xs, ys, self.Node.zero_conv))
+            if np.any(ccs >= 1 - self.p_safe):
+                return False
+        return True
+
+    @staticmethod
+    def safe_steer_points(parent_x, parent_y, x, y):
+        """
+        points checked by safe_steer between a parent pose and a node, 10 steps from the parent
+        return (xs, ys, yaw), yaw is the direction parent -> node
+        """
+        jiaodu = math.atan2(y - parent_y, x - parent_x)
+        xs = np.ones(10) * x if parent_x == x else np.arange(parent_x, x, (x - parent_x) / 10.0)
+        ys = np.ones(10) * y if parent_y == y else np.arange(parent_y, y, (y - parent_y) / 10.0)
+        n = min(len(xs), len(ys))
+        return xs[:n], ys[:n], jiaodu
+
+    def plot_arrow(self, x, y, yaw, length=0.5, width=0.25, fc="r", ec="k"):
+        """
+        Plot arrow
+        """
+        if not isinstance(x, float):
+            for (ix, iy, iyaw) in zip(x, y, yaw):
+                self.plot_arrow(ix, iy, iyaw)
+        else:
+            plt.arrow(x, y, length * math.cos(yaw), length * math.sin(yaw),
+                      fc=fc, ec=ec, head_width=width, head_length=width)
+            plt.plot(x, y)
+
+    def draw_graph(self, rnd=None):
+        plt.clf()
+        #ax = plt.axes()
+        ax = plt.axes([0.3, 0.1, 8 / 55, 8 / 10])
+        # _, ax = plt.subplots()
+        # for stopping simulation with the esc key.
+        plt.gcf().canvas.mpl_connect('key_release_event',
+                                     lambda event: [exit(0) if event.key == 'escape' else None])
+        for obs in self.obstacle_list:
+            ellipse = Ellipse((obs[0], obs[1]), obs[2] * 2.0, obs[3] * 2.0, angle=math.degrees(obs[4]),color='#00CED1')
+            ax.add_patch(ellipse)
+        #ziche = Rectangle((8.0+1.9/2, 1.11-2.9/2), 2.9, 1.9 , math.degrees(np.deg2rad(130.0)))
+        # 8.0, 1.11, 2.9, 1.9, np.deg2rad(130.0)
+        #ax.add_patch(ziche)
+        if rnd is not None:
+            plt.plot(rnd.x, rnd.y, "^k")
+        for node in self.node_list:
+            plt.plot(node.x, node.y, "*b")
+            self.plot_arrow(node.x, node.y, node.yaw, fc='b')
+        if self.goal_tree is not None:
+            for node in self.goal_tree:
+                plt.plot(node.x, node.y, "*g")
+        plt.title("With considering uncertainty (represented by ellipse)\nccrrt    P_safe:%f" % self.p_safe)
+        plt.plot(self.start.x, self.start.y, "xr")
+        self.plot_arrow(self.start.x, self.start.y, self.start.yaw, fc='r')
+        plt.plot(self.end.x, self.end.y, "xg")
+        self.plot_arrow(self.end.x, self.end.y, self.end.yaw, fc='g')
+        plt.axis("equal")
+        plt.axis([self.min_rand_x, self.max_rand_x, self.min_rand_y, self.max_rand_y])
+        plt.grid(True)
+        plt.pause(0.01)
+
+    def draw_path(self):
+        for node in self.path:
+            plt.plot(node.x, node.y, "*r")
+            self.plot_arrow(node.x, node.y, node.yaw, fc='r')
+        plt.title("With considering uncertainty (represented by ellipse)\nccrrt    P_safe:%f" % self.p_safe)
+        plt.plot(self.start.x, self.start.y, "*y", markersize=10, label='start')
+        self.plot_arrow(self.start.x, self.start.y, self.start.yaw, fc='y')
+        plt.plot(self.end.x, self.end.y, "*g", markersize=10, label='goal')
+        self.plot_arrow(self.end.x, self.end.y, self.end.yaw, fc='g')
+        plt.legend(loc='upper right')
+
+    @staticmethod
+    def plot_circle(x, y, size, color="-b"):  # pragma: no cover
+        deg = list(range(0, 360, 5))
+        deg.append(0)
+        xl = [x + size * math.cos(np.deg2rad(d)) for d in deg]
+        yl = [y + size * math.sin(np.deg2rad(d)) for d in deg]
+        plt.plot(xl, yl, color)
+
+    @staticmethod
+    def calc_distance_and_angle(from_node, to_node):
+        """
+        arg1:from_node -> arg2:to_node
+        """
+        dx = to_node.x - from_node.x
+        dy = to_node.y - from_node.y
+        d = math.hypot(dx, dy)
+        theta = math.atan2(dy, dx)
+        return d, theta
+
+    @staticmethod
+    def calc_distance(from_node, to_node):
+        dx = to_node.x - from_node.x
+        dy = to_node.y - from_node.y
+        return math.hypot(dx, dy)
+
+    @staticmethod
+    def angle_wrap(angle):
+        while angle <= -math.pi:
+            angle = angle + 2 * math.pi
+        while angle > math.pi:
+            angle = angle - 2 * math.pi
+        return angle
+
+    @staticmethod
+    def angle_wrap_array(angle):
+        """
+        angle_wrap for arrays, result in (-pi, pi]
+        """
+        angle = np.mod(angle + math.pi, 2 * math.pi) - math.pi
+        return np.where(angle <= -math.pi, angle + 2 * math.pi, angle)
+
+dis_threshold = 25.5
+
+
+def un_generate(dis, p1, p2, absolute=False, rng=None):
+    """
+    synthetic uncertainty of an obstacle at distance dis: base = dis / dis_threshold plus N(0, base * p1) noise
+    absolute: add |noise|, the uncertainty does not get below the base
+    rng: np.random.Generator the noise is drawn from (None: fresh entropy)
+    """
+    base = dis / dis_threshold
+    sigma_base = np.random.default_rng(rng).normal(0.0, base * p1)
+    if absolute:
+        sigma_base = np.abs(sigma_base)
+    return (base + sigma_base) * p2
+
+
+# obstacle lists are (x, y, long half axis, short half axis, yaw, margin long, margin short)
+# margin: how much the half axes grew over the detected box, see obstacle_margin
+def obstacle_synthetic_fusion(gts, uncertainties):
+    """
+    detected boxes gts (x, y, length, width, yaw, ...) grown by synthetic uncertainties (sigma_ver, sigma_hor, sigma_radius)
+    """
+    obs = []
+    for gt, un in zip(gts, uncertainties):
+        a = gt[2] / 2.0
+        b = gt[3] / 2.0
+        d_a = a * (1 - b * np.sqrt((1 + np.tan(un[2]) ** 2) / (b ** 2 + a ** 2 * np.tan(un[2]) ** 2)))
+        d_b = d_a / a * b
+        obs.append((gt[0], gt[1], a + d_a + un[0], b + d_b + un[1], gt[4], d_a + un[0], d_b + un[1]))
+    return obs
+
+
+def obstacle_uncertainty_fusion(gts):
+    obs = []
+    for gt in gts:
+        obs.append((gt[0], gt[1], gt[5], gt[6], gt[4], gt[5] - gt[2] / 2.0, gt[6] - gt[3] / 2.0))  #注意，这里的列表中表示的椭圆，使用长短半轴表示的，并不是整个轴！！！
+    return obs
+
+
+def obstacle_bbox(gts):
+    """
+    the detected boxes without uncertainty
+    """
+    return [(gt[0], gt[1], gt[2] / 2.0, gt[3] / 2.0, gt[4], 0.0, 0.0) for gt in gts]
+
+
+def obstacle_margin(obs_list):
+    """
+    only the uncertainty margins of obs_list as obstacles, for a chance constraint that leaves the box itself
+    to the collision check
+    """
+    return [(obs[0], obs[1], obs[5], obs[6], obs[4]) for obs in obs_list]
+
+
+def draw_vehicle(obs_list):
+    for obs in obs_list:
+        w = obs[3] / 2.0
+        l = obs[2] / 2.0
+        x = obs[0]
+        y = obs[1]
+        yaw = obs[4]
+        p0 = [
+            x + l * math.cos(yaw) + w * math.sin(yaw),
+            y + l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        p1 = [
+            x + l * math.cos(yaw) - w * math.sin(yaw),
+            y + l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p2 = [
+            x - l * math.cos(yaw) - w * math.sin(yaw),
+            y - l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p3 = [
+            x - l * math.cos(yaw) + w * math.sin(yaw),
+            y - l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        plt.plot([p0[0], p1[0]], [p0[1], p1[1]], 'k', color="r")
+        plt.plot([p1[0], p2[0]], [p1[1], p2[1]], 'k', color="r")
+        plt.plot([p2[0], p3[0]], [p2[1], p3[1]], 'k', color="r")
+        plt.plot([p3[0], p0[0]], [p3[1], p0[1]], 'k', color="r")
+
+def draw_ground_true(obs_list):
+    x1=True
+    for obs in obs_list:
+       # x=0
+        w = obs[3] / 2.0
+        l = obs[2] / 2.0
+        x = obs[0]
+        y = obs[1]
+        yaw = obs[4]
+        p0 = [
+            x + l * math.cos(yaw) + w * math.sin(yaw),
+            y + l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        p1 = [
+            x + l * math.cos(yaw) - w * math.sin(yaw),
+            y + l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p2 = [
+            x - l * math.cos(yaw) - w * math.sin(yaw),
+            y - l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p3 = [
+            x - l * math.cos(yaw) + w * math.sin(yaw),
+            y - l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        if (x1):
+            plt.plot([p0[0], p1[0]], [p0[1], p1[1]], 'k', color="orange", lw='1')
+            plt.plot([p1[0], p2[0]], [p1[1], p2[1]], 'k', color="orange", lw='1')
+            plt.plot([p2[0], p3[0]], [p2[1], p3[1]], 'k', color="orange", lw='1')
+            plt.plot([p3[0], p0[0]], [p3[1], p0[1]], 'k', color="orange", lw='1')
+        else:
+            plt.plot([p0[0], p1[0]], [p0[1], p1[1]], 'k', color="green", lw='1')
+            plt.plot([p1[0], p2[0]], [p1[1], p2[1]], 'k', color="green", lw='1')
+            plt.plot([p2[0], p3[0]], [p2[1], p3[1]], 'k', color="green", lw='1')
+            plt.plot([p3[0], p0[0]], [p3[1], p0[1]], 'k', color="green", lw='1')
+        x1 = False
+
+def draw_carsize_of_final_path(obs_list):
+    for obs in obs_list:
+       # x=0
+        w = 1.7 / 2.0
+        l = 2.8 / 2.0
+        x = obs.x
+        y = obs.y
+        yaw = obs.yaw
+        p0 = [
+            x + l * math.cos(yaw) + w * math.sin(yaw),
+            y + l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        p1 = [
+            x + l * math.cos(yaw) - w * math.sin(yaw),
+            y + l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p2 = [
+            x - l * math.cos(yaw) - w * math.sin(yaw),
+            y - l * math.sin(yaw) + w * math.cos(yaw)
+        ]
+        p3 = [
+            x - l * math.cos(yaw) + w * math.sin(yaw),
+            y - l * math.sin(yaw) - w * math.cos(yaw)
+        ]
+        plt.plot([p0[0], p1[0]], [p0[1], p1[1]], 'k', color="black",lw='0.8')
+        plt.plot([p1[0], p2[0]], [p1[1], p2[1]], 'k', color="black",lw='0.8')
+        plt.plot([p2[0], p3[0]], [p2[1], p3[1]], 'k', color="black",lw='0.8')
+        plt.plot([p3[0], p0[0]], [p3[1], p0[1]], 'k', color="black",lw='0.8')
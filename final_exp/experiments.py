@@ -0,0 +1,372 @@
+"""
+CC-RRT experiments: scenario / variant registry and Monte Carlo batch runner
+
+scenarios/<scenario>.json, one traffic scene:
+    area: [x-min, x-max, y-min, y-max], start / goal: [x, y, yaw (deg)]
+    obstacles: detected obstacles [x, y, length, width, yaw (deg), perceived long half axis, perceived short half axis]
+    ground_truth: real obstacles [x, y, length, width, yaw (deg)], a path running over one of them fails
+    params: CCRRT attributes for the scene (optional)
+experiments.json:
+    variants: name -> how the planner sees the obstacles and what counts as a failure, see VARIANT_DEFAULTS
+    experiments: [{name, scenario, variant, trials, ...}], any variant key can be overridden per experiment,
+    goal overrides the scenario goal
+
+python experiments.py                            all Monte Carlo experiments (trials > 1)
+python experiments.py 1ccrrt100 "success1/*"     experiments by name (fnmatch patterns)
+python experiments.py 1ccrrt --plot              one trial drawn like the old single run scripts
+python experiments.py --list
+"""
+
+import argparse
+import contextlib
+import fnmatch
+import functools
+import io
+import json
+import math
+import multiprocessing
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from ccrrt import (CCRRT, Vehicle, draw_carsize_of_final_path, draw_ground_true, draw_vehicle, obstacle_bbox,
+                   obstacle_margin, obstacle_synthetic_fusion, obstacle_uncertainty_fusion, un_generate)
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REGISTRY = os.path.join(ROOT, "experiments.json")
+SCENARIO_DIR = os.path.join(ROOT, "scenarios")
+
+VARIANT_DEFAULTS = {
+    # obstacles the tree grows around: "pu" perceived boxes, "raw" detected boxes,
+    # "fake" detected boxes grown by synthetic noise
+    "planner_obstacles": "pu",
+    # for "fake": {"p1": [...], "p2": [...], "absolute": false}, per (sigma_ver, sigma_hor, sigma_radius), see un_generate
+    "noise": None,
+    "cc_obstacles": "planner",  # chance constraint against "planner" obstacles or the "pu" perceived boxes
+    # "axes": the obstacle half axes are its uncertainty, "margin": only the growth over the detected box
+    "cc_uncertainty": "axes",
+    "collision_obstacles": "planner",  # collision check of steering against "planner" obstacles or "raw" boxes
+    "cc_filter": True,  # CCRRT.cc_filter
+    "eval_cc": "planner",  # path cc in the statistics: "planner" node cc, "pu" against the perceived boxes
+    "fail_no_path": True,  # a trial without a path fails
+    "fail_max_cc": False,  # a path with max cc >= 1 - p_safe fails
+    "params": {},  # CCRRT attributes
+    "car": {},  # Vehicle attributes
+}
+
+
+def load_scenario(name):
+    """
+    scenarios/<name>.json with angles in rad and the ground truth as half axes
+    """
+    with open(os.path.join(SCENARIO_DIR, name + ".json"), encoding="utf-8") as f:
+        data = json.load(f)
+    return {
+        "area": data["area"],
+        "start": [data["start"][0], data["start"][1], np.deg2rad(data["start"][2])],
+        "goal": [data["goal"][0], data["goal"][1], np.deg2rad(data["goal"][2])],
+        "obstacles": [(x, y, l, w, np.deg2rad(yaw), a, b) for x, y, l, w, yaw, a, b in data["obstacles"]],
+        "ground_truth": [(x, y, l / 2, w / 2, np.deg2rad(yaw)) for x, y, l, w, yaw in data["ground_truth"]],
+        "params": data.get("params", {}),
+    }
+
+
+def load_experiments(registry=REGISTRY):
+    """
+    all experiments of the registry by name, each a self-contained dict (scenario data, variant keys, trials)
+    that run_trial gets
+    """
+    with open(registry, encoding="utf-8") as f:
+        data = json.load(f)
+    scenarios = {}
+    experiments = {}
+    for entry in data["experiments"]:
+        if entry["scenario"] not in scenarios:
+            scenarios[entry["scenario"]] = load_scenario(entry["scenario"])
+        scenario = scenarios[entry["scenario"]]
+        variant = data["variants"][entry["variant"]]
+        experiment = dict(VARIANT_DEFAULTS, **variant)
+        experiment.update(entry)
+        experiment.update({key: scenario[key] for key in ("area", "start", "obstacles", "ground_truth")})
+        goal = entry.get("goal")
+        experiment["goal"] = scenario["goal"] if goal is None else [goal[0], goal[1], np.deg2rad(goal[2])]
+        experiment["params"] = dict(scenario["params"], **variant.get("params", {}), **entry.get("params", {}))
+        experiment["car"] = dict(variant.get("car", {}), **entry.get("car", {}))
+        experiments[entry["name"]] = experiment
+    return experiments
+
+
+def trial_rngs(seed, trial):
+    """
+    independent generators (planner, noise) of trial number trial of a run seeded with seed
+    the streams are children of np.random.SeedSequence(seed), the same as SeedSequence(seed).spawn(n)[trial].spawn(2),
+    they only depend on seed and trial, not on the worker or the order the trials run in
+    """
+    return [np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(trial, stream))) for stream in range(2)]
+
+
+def build_planner(experiment, rng=None, noise_rng=None):
+    """
+    CCRRT for one trial of experiment
+    rng: generator of the planner, noise_rng: generator of the synthetic noise ("fake"), see trial_rngs
+    return (planner, perceived obstacle list for eval_cc "pu")
+    """
+    gts = experiment["obstacles"]
+    start = experiment["start"]
+    perceived = obstacle_uncertainty_fusion(gts)
+    bbox = obstacle_bbox(gts)
+    if experiment["planner_obstacles"] == "fake":
+        noise = experiment["noise"]
+        uncertainties = []
+        for obs in gts:
+            dist = np.hypot(start[0] - obs[0], start[1] - obs[1])
+            uncertainties.append(tuple(un_generate(dist, p1, p2, noise.get("absolute", False), noise_rng)
+                                       for p1, p2 in zip(noise["p1"], noise["p2"])))
+        obstacle_list = obstacle_synthetic_fusion(gts, uncertainties)
+    else:
+        obstacle_list = {"pu": perceived, "raw": bbox}[experiment["planner_obstacles"]]
+    cc_obstacle_list = obstacle_list if experiment["cc_obstacles"] == "planner" else perceived
+    eval_obstacle_list = perceived
+    if experiment["cc_uncertainty"] == "margin":
+        cc_obstacle_list = obstacle_margin(cc_obstacle_list)
+        eval_obstacle_list = obstacle_margin(perceived)
+
+    car = Vehicle()
+    for name, value in experiment["car"].items():
+        setattr(car, name, value)
+    cc_rrt = CCRRT(
+        car=car,
+        start=experiment["start"],
+        goal=experiment["goal"],
+        rand_area=experiment["area"],
+        obstacle_list=obstacle_list,
+        cc_obstacle_list=cc_obstacle_list,
+        collision_obstacle_list=bbox if experiment["collision_obstacles"] == "raw" else obstacle_list,
+        rng=rng)
+    cc_rrt.cc_filter = experiment["cc_filter"]
+    for name, value in experiment["params"].items():
+        setattr(cc_rrt, name, value)
+    return cc_rrt, eval_obstacle_list
+
+
+def run_trial(experiment, seed, trial=0, quiet=True, with_metric=False):
+    """
+    trial number trial of a Monte Carlo run of experiment seeded with seed, random numbers come from trial_rngs
+    quiet: drop the planner output
+    with_metric: plan with metric, the planner metrics (CCRRT.metrics) go into the result as metrics
+    return a dict: name, seed, trial, found (a path was found), timed_out (the search stopped at the time budget),
+    hit (the path runs over the ground truth), fail and for a found path ccs (path cc, see eval_cc), points (number of path nodes), length (path length)
+    """
+    rng, noise_rng = trial_rngs(seed, trial)
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        cc_rrt, eval_obstacle_list = build_planner(experiment, rng, noise_rng)
+        cc_rrt.planning(animation=False, with_metric=with_metric)
+    result = {"name": experiment["name"], "seed": seed, "trial": trial, "found": cc_rrt.path_source == "path_end",
+              "timed_out": cc_rrt.timed_out, "hit": False}
+    if with_metric:
+        result["metrics"] = cc_rrt.metrics
+    if not result["found"]:
+        result["fail"] = experiment["fail_no_path"]
+        return result
+    path = cc_rrt.path
+    # 整条路径一次做碰撞检测，第二个参数是列表，列表是【障碍物x，障碍物y，长半轴，短半轴，yaw】
+    hit = cc_rrt.peng_zhuang_jian_ce_batch([node.x for node in path], [node.y for node in path],
+                                           [node.yaw for node in path], experiment["ground_truth"])
+    result["hit"] = bool(hit.any())
+    if experiment["eval_cc"] == "planner":
+        result["ccs"] = [node.cc for node in path]
+    else:
+        result["ccs"] = cc_rrt.get_path_chance_constrain(path, eval_obstacle_list)
+    result["points"] = len(path)
+    length = 0
+    for j in range(len(path) - 1):
+        changdu, _ = CCRRT.calc_distance_and_angle(path[j], path[j + 1])
+        length = length + changdu
+    result["length"] = length
+    result["fail"] = result["hit"] or (experiment["fail_max_cc"] and np.max(result["ccs"]) >= 1 - cc_rrt.p_safe)
+    return result
+
+
+def run_trials(experiment, n_trials=100, seed=0, n_workers=None, callback=None, pool=None, with_metric=False):
+    """
+    trials 0 .. n_trials - 1 of experiment seeded with seed (replay trial i with run_trial(experiment, seed, i))
+    with_metric: see run_trial
+    pool: a multiprocessing pool to run on, otherwise one with n_workers processes is started
+    (None: one per cpu, 1: run in this process)
+    results are streamed back in trial order, callback(i, result) is called for each of them
+    return the list of run_trial results
+    """
+    trials = range(n_trials)
+    trial = functools.partial(run_trial, experiment, seed, with_metric=with_metric)
+    results = []
+    with contextlib.ExitStack() as stack:
+        if pool is None and n_workers == 1:
+            stream = map(trial, trials)
+        else:
+            if pool is None:
+                pool = stack.enter_context(multiprocessing.Pool(n_workers))
+            stream = pool.imap(trial, trials)
+        for i, result in enumerate(stream):
+            results.append(result)
+            if callback is not None:
+                callback(i, result)
+    return results
+
+
+def summarize_trials(results):
+    """
+    aggregate statistics of run_trial results, path values are averaged over the trials with a path that did not fail
+    (nan when there is none)
+    return a dict: max / avg / min (path cc), points, changdu (path length), fail, cycle_times, success_rate
+    """
+    ok = [result for result in results if result["found"] and not result["fail"]]
+    fail = sum(result["fail"] for result in results)
+
+    def average(values):
+        return np.average(values) if len(values) else math.nan
+
+    return {
+        "max": average([np.max(result["ccs"]) for result in ok]),
+        "avg": average([np.average(result["ccs"]) for result in ok]),
+        "min": average([np.min(result["ccs"]) for result in ok]),
+        "points": average([result["points"] for result in ok]),
+        "changdu": average([result["length"] for result in ok]),
+        "fail": fail,
+        "cycle_times": len(results),
+        "success_rate": (len(results) - fail) / len(results),
+    }
+
+
+def summarize_metrics(results):
+    """
+    planner metrics (run_trial with_metric) averaged over all trials
+    """
+    metrics = [result["metrics"] for result in results]
+    return {key: np.average([metric[key] for metric in metrics]) for key in metrics[0]}
+
+
+def print_trial(i, result):
+    if not result["found"]:  # 这里是没有找到路径
+        print("because on path ::::fail")
+    elif result["hit"]:
+        print('有路径，但是这个路径从groundtruth上踏过！！！！！！！！')
+    elif result["fail"]:
+        print("the max cc >= 1-Psafe !")
+    else:
+        print(result["ccs"])
+        print(result["points"])
+    print('*' * 100)
+    print(result["name"], i)
+
+
+def print_summary(name, stats):
+    print('*' * 100)
+    print(name)
+    print("max: %f" % stats["max"])
+    print("avg: %f" % stats["avg"])
+    print("min: %f" % stats["min"])
+    print("points: %f" % stats["points"])
+    print("changdu: %f" % stats["changdu"])
+    print("fail=:= %f" % stats["fail"])
+    print(stats["cycle_times"])
+    print("success rate: %f" % stats["success_rate"])
+
+
+def print_metrics(metrics):
+    print("metric, average per trial:")
+    for name in CCRRT.Metric.phases:
+        print("  %-16s %10.4f s %10.1f calls" % (name, metrics[name + "_time"], metrics[name + "_calls"]))
+    for name in CCRRT.Metric.counters + ("nodes", "paths"):
+        print("  %-16s %10.1f" % (name, metrics[name]))
+    print("  %-16s %10.4f s" % ("total", metrics["total_time"]))
+
+
+def plot_trial(experiment, seed, trial=0):
+    """
+    trial of experiment (see run_trial) in this process, tree, path, obstacles and path risk drawn
+    """
+    cc_rrt, _ = build_planner(experiment, *trial_rngs(seed, trial))
+    cc_rrt.planning(animation=False)
+    start = experiment["start"]
+    ego = (start[0], start[1], cc_rrt.car.l_f + cc_rrt.car.l_r, cc_rrt.car.w, start[2])
+
+    cc_rrt.draw_graph()
+    cc_rrt.draw_path()
+    draw_vehicle(experiment["obstacles"])
+    draw_ground_true([ego] + [(x, y, l * 2, w * 2, yaw) for x, y, l, w, yaw in experiment["ground_truth"]])
+    draw_carsize_of_final_path(cc_rrt.path)
+
+    plt.figure(2)
+    tmp = [node.cc for node in cc_rrt.path]
+    area = experiment["area"]
+    plt.axes([0.3, 0.1, 8 / 50, 8 / 10.55])
+    plt.title("%s\nP_safe:%f" % (experiment["name"], cc_rrt.p_safe))
+    plt.scatter([node.x for node in cc_rrt.node_list],
+                [node.y for node in cc_rrt.node_list],
+                s=3,
+                c=[node.cc for node in cc_rrt.node_list],
+                cmap='jet')
+    plt.plot([node.x for node in cc_rrt.path],
+             [node.y for node in cc_rrt.path],
+             c='k',
+             label="path risk value:\nmin: %.3f\nmax: %.3f\navg: %.3f" % (np.min(tmp), np.max(tmp), np.average(tmp)))
+    plt.colorbar()
+    plt.axis([area[0], area[1], area[2], area[3]])
+    plt.legend(loc='upper right')
+    plt.grid(True)
+    plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="run CC-RRT experiments of the registry")
+    parser.add_argument("names", nargs="*", help="experiment names or fnmatch patterns, default: all with trials > 1")
+    parser.add_argument("--trials", type=int, help="trials per experiment instead of the registry value")
+    parser.add_argument("--seed", type=int, default=0, help="root seed of the trial streams, see trial_rngs")
+    parser.add_argument("--trial", type=int, default=0, help="trial to draw with --plot")
+    parser.add_argument("--workers", type=int, help="process pool size, default: one per cpu, 1: no pool")
+    parser.add_argument("--plot", action="store_true", help="draw one trial of each experiment")
+    parser.add_argument("--time-budget", type=float, help="seconds of search per trial (CCRRT.time_budget)")
+    parser.add_argument("--metrics", action="store_true", help="profile the planner phases, see CCRRT.Metric")
+    parser.add_argument("--list", action="store_true", help="list the experiments")
+    args = parser.parse_args()
+
+    experiments = load_experiments()
+    if args.names:
+        names = [name for name in experiments if any(fnmatch.fnmatch(name, pattern) for pattern in args.names)]
+    else:
+        names = [name for name in experiments if experiments[name]["trials"] > 1]
+    if args.time_budget is not None:
+        for name in names:
+            experiments[name]["params"] = dict(experiments[name]["params"], time_budget=args.time_budget)
+    if args.list:
+        for name in names:
+            print("%-40s scenario %s, variant %s, %d trials" % (
+                name, experiments[name]["scenario"], experiments[name]["variant"], experiments[name]["trials"]))
+        return
+    if args.plot:
+        for name in names:
+            plot_trial(experiments[name], args.seed, args.trial)
+        return
+
+    summaries = {}
+    with contextlib.ExitStack() as stack:
+        # one pool for all experiments, workers stay warm between them
+        pool = None if args.workers == 1 else stack.enter_context(multiprocessing.Pool(args.workers))
+        for name in names:
+            print("Start -----------------------------%s!!!!!!!!!!!!!!!!!!!!!!!!!" % name)
+            n_trials = args.trials or experiments[name]["trials"]
+            results = run_trials(experiments[name], n_trials, args.seed, n_workers=1 if pool is None else None,
+                                 callback=print_trial, pool=pool, with_metric=args.metrics)
+            summaries[name] = summarize_trials(results)
+            print_summary(name, summaries[name])
+            if args.metrics:
+                print_metrics(summarize_metrics(results))
+    print('*' * 100)
+    for name, stats in summaries.items():
+        print("%-40s success rate: %f  max: %f  avg: %f  min: %f  points: %f  changdu: %f" % (
+            name, stats["success_rate"], stats["max"], stats["avg"], stats["min"], stats["points"], stats["changdu"]))
+
+
+if __name__ == '__main__':
+    main()